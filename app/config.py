@@ -6,4 +6,78 @@ load_dotenv()
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 if not GOOGLE_API_KEY:
     raise ValueError("Please set GOOGLE_API_KEY in .env")
-os.environ["GOOGLE_API_KEY"] = GOOGLE_API_KEY
\ No newline at end of file
+os.environ["GOOGLE_API_KEY"] = GOOGLE_API_KEY
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+# Admission control for the upstream model clients
+LLM_LIMITS = {
+    "max_concurrent": _env_int("LLM_MAX_CONCURRENT", 4),
+    "max_queue": _env_int("LLM_MAX_QUEUE", 32),
+    "max_per_user": _env_int("LLM_MAX_QUEUED_PER_USER", 2),
+    "queue_timeout": _env_float("LLM_QUEUE_TIMEOUT", 30.0),
+}
+EMBEDDING_LIMITS = {
+    "max_concurrent": _env_int("EMBEDDING_MAX_CONCURRENT", 8),
+    "max_queue": _env_int("EMBEDDING_MAX_QUEUE", 64),
+    "max_per_user": _env_int("EMBEDDING_MAX_QUEUED_PER_USER", 4),
+    "queue_timeout": _env_float("EMBEDDING_QUEUE_TIMEOUT", 10.0),
+}
+
+# Pooled HTTP connections, deadlines, retries and hedging for the model clients
+HTTP_POOL = {
+    "pool_connections": _env_int("HTTP_POOL_CONNECTIONS", 4),
+    "pool_maxsize": _env_int("HTTP_POOL_MAXSIZE", 16),
+}
+LLM_CLIENT = {
+    "timeout": _env_float("LLM_TIMEOUT", 30.0),
+    "deadline": _env_float("LLM_DEADLINE", 60.0),
+    "retries": _env_int("LLM_RETRIES", 2),
+    "backoff": _env_float("LLM_RETRY_BACKOFF", 1.0),
+}
+EMBEDDING_CLIENT = {
+    "timeout": _env_float("EMBEDDING_TIMEOUT", 10.0),
+    "deadline": _env_float("EMBEDDING_DEADLINE", 20.0),
+    "retries": _env_int("EMBEDDING_RETRIES", 3),
+    "backoff": _env_float("EMBEDDING_RETRY_BACKOFF", 0.25),
+    # Seconds before a duplicate embedding request is sent; 0 disables hedging
+    "hedge_delay": _env_float("EMBEDDING_HEDGE_DELAY", 0),
+    # Hedged duplicates allowed in flight at once; each also needs a free embedding slot
+    "max_hedges": _env_int("EMBEDDING_MAX_HEDGES", 2),
+}
+
+# Vector storage used for search: "float32" (Chroma), "float16" or "int8"
+INDEX_DTYPE = os.getenv("INDEX_DTYPE", "float32")
+# Candidates re-scored at full precision per result when INDEX_DTYPE is compact
+INDEX_RESCORE = _env_int("INDEX_RESCORE", 4)
+
+# Multi-tenant hosting: per-tenant sources under TENANTS_DATA_DIR, open indexes kept in an LRU
+TENANTS_DATA_DIR = os.getenv("TENANTS_DATA_DIR", "data/tenants")
+# Comma-separated URLs indexed with the default profile
+DEFAULT_TENANT_URLS = [
+    url.strip()
+    for url in os.getenv(
+        "DEFAULT_TENANT_URLS", "https://www.linkedin.com/in/joel-chacon-castillo-351bb4194/"
+    ).split(",")
+    if url.strip()
+]
+TENANT_CACHE = {
+    "max_open": _env_int("TENANT_MAX_OPEN", 8),
+    "max_bytes": _env_int("TENANT_MAX_MB", 256) * 1024 * 1024,
+    "idle_ttl": _env_float("TENANT_IDLE_TTL", 900.0),
+}
+
+# Opt-in request profiling: send "X-Profile: <PROFILE_TOKEN>" or sample a fraction of requests
+PROFILING = {
+    "output_dir": os.getenv("PROFILE_DIR", "./profiles"),
+    "sample_rate": _env_float("PROFILE_SAMPLE_RATE", 0.0),
+    "token": os.getenv("PROFILE_TOKEN") or None,
+    "max_profiles": _env_int("PROFILE_MAX_KEPT", 20),
+}
@@ -0,0 +1,197 @@
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# User on whose behalf the current request runs; used for per-user fairness
+current_user = ContextVar("current_user", default="anonymous")
+
+
+class OverloadedError(Exception):
+    """Raised when a call cannot be admitted; maps to an HTTP 429/503 response."""
+    def __init__(self, message: str, status_code: int = 503, retry_after: int = 1):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class UserLimitError(OverloadedError):
+    """
+    The calling user already has too many queued calls (HTTP 429). Unlike a
+    full queue or a queue timeout, this concerns that user only.
+    """
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message, status_code=429, retry_after=retry_after)
+
+
+class ConcurrencyLimiter:
+    """
+    Bounded concurrency with a bounded, per-user fair wait queue.
+
+    At most `max_concurrent` calls run at once. Extra callers wait in a queue
+    of at most `max_queue` entries; when a slot frees up, waiting users are
+    served round-robin so one busy user cannot starve the others. A user may
+    hold at most `max_per_user` queued entries. Callers that cannot be queued,
+    or that wait longer than `queue_timeout` seconds, get an OverloadedError
+    carrying a Retry-After estimate instead of piling up.
+    """
+    def __init__(
+        self,
+        name: str,
+        max_concurrent: int = 4,
+        max_queue: int = 32,
+        max_per_user: int = 4,
+        queue_timeout: float = 30.0
+    ):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_per_user = max_per_user
+        self.queue_timeout = queue_timeout
+
+        self._cond = threading.Condition()
+        self._active = 0
+        self._queued = 0
+        self._waiting = OrderedDict()  # user_id -> deque of waiting tickets
+        self._granted = set()
+
+        self._admitted = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._avg_service = 1.0  # moving average of call duration, in seconds
+
+    def _retry_after(self) -> int:
+        backlog = (self._queued + 1) / max(self.max_concurrent, 1)
+        return max(1, math.ceil(backlog * self._avg_service))
+
+    def _grant_next(self):
+        """Hand free slots to waiting users in round-robin order. Caller holds the lock."""
+        while self._waiting and self._active < self.max_concurrent:
+            user_id, tickets = self._waiting.popitem(last=False)
+            self._granted.add(tickets.popleft())
+            if tickets:
+                self._waiting[user_id] = tickets  # back of the line
+            self._active += 1
+            self._queued -= 1
+        self._cond.notify_all()
+
+    def _record_wait(self, waited: float):
+        self._admitted += 1
+        self._total_wait += waited
+        self._max_wait = max(self._max_wait, waited)
+
+    def acquire(self, user_id: str = None):
+        user_id = user_id or current_user.get()
+        start = time.monotonic()
+        with self._cond:
+            if self._active < self.max_concurrent and not self._queued:
+                self._active += 1
+                self._record_wait(0.0)
+                return
+
+            if self._queued >= self.max_queue:
+                self._rejected += 1
+                raise OverloadedError(
+                    f"{self.name} is overloaded, please retry later.",
+                    status_code=503,
+                    retry_after=self._retry_after(),
+                )
+            tickets = self._waiting.get(user_id)
+            if tickets is not None and len(tickets) >= self.max_per_user:
+                self._rejected += 1
+                raise UserLimitError(
+                    f"Too many pending {self.name} requests for this user.",
+                    retry_after=self._retry_after(),
+                )
+
+            ticket = object()
+            self._waiting.setdefault(user_id, deque()).append(ticket)
+            self._queued += 1
+
+            deadline = start + self.queue_timeout
+            while ticket not in self._granted:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            if ticket in self._granted:
+                self._granted.discard(ticket)
+                self._record_wait(time.monotonic() - start)
+                return
+
+            # Timed out while still queued
+            tickets = self._waiting.get(user_id)
+            tickets.remove(ticket)
+            if not tickets:
+                del self._waiting[user_id]
+            self._queued -= 1
+            self._timed_out += 1
+            raise OverloadedError(
+                f"Timed out waiting for {self.name} capacity.",
+                status_code=503,
+                retry_after=self._retry_after(),
+            )
+
+    def try_acquire(self) -> bool:
+        """Take a free slot without queueing; False when none is free or others are waiting."""
+        with self._cond:
+            if self._active < self.max_concurrent and not self._queued:
+                self._active += 1
+                self._record_wait(0.0)
+                return True
+            return False
+
+    def release(self, duration: float = None):
+        with self._cond:
+            self._active -= 1
+            if duration is not None:
+                self._avg_service = 0.8 * self._avg_service + 0.2 * duration
+            self._grant_next()
+
+    @contextmanager
+    def slot(self, user_id: str = None):
+        self.acquire(user_id)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - start)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "active": self._active,
+                "queue_depth": self._queued,
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+                "avg_wait_ms": round(1000 * self._total_wait / max(self._admitted, 1), 2),
+                "max_wait_ms": round(1000 * self._max_wait, 2),
+                "avg_service_ms": round(1000 * self._avg_service, 2),
+            }
+
+
+# Process-wide limiters, shared by every RAG instance in the process
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name: str, **settings) -> ConcurrencyLimiter:
+    """Return the shared limiter called `name`, creating it on first use."""
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = ConcurrencyLimiter(name, **settings)
+        return _limiters[name]
+
+
+def limiter_stats() -> dict:
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.name: limiter.stats() for limiter in limiters}
@@ -0,0 +1,295 @@
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# HTTP statuses worth retrying; everything else is returned to the caller as is
+TRANSIENT_STATUS = {408, 425, 429, 500, 502, 503, 504}
+# Exceptions raised by the Google / Hugging Face clients for transient failures
+TRANSIENT_ERRORS = {
+    "ResourceExhausted",
+    "ServiceUnavailable",
+    "DeadlineExceeded",
+    "InternalServerError",
+    "TooManyRequests",
+    "GatewayTimeout",
+    "BadGateway",
+}
+
+
+class DeadlineExceeded(TimeoutError):
+    """The call did not finish within its overall time budget."""
+
+
+def _status_code(error):
+    response = getattr(error, "response", None)
+    for holder in (error, response):
+        for attr in ("status_code", "code"):
+            value = getattr(holder, attr, None)
+            value = value() if callable(value) else value
+            if isinstance(value, int):
+                return value
+    return None
+
+
+def _httpx_transport_errors() -> tuple:
+    # huggingface_hub >= 1.0 and the Google clients may talk through httpx instead of requests
+    try:
+        import httpx
+    except ImportError:
+        return ()
+    return (httpx.TransportError,)
+
+
+def is_transient(error: Exception) -> bool:
+    if isinstance(error, (requests.ConnectionError, requests.Timeout, ConnectionError, TimeoutError)):
+        return True
+    if isinstance(error, _httpx_transport_errors()):
+        return True
+    if _status_code(error) in TRANSIENT_STATUS:
+        return True
+    # Wrapped errors (e.g. ChatGoogleGenerativeAIError) keep the original as __cause__
+    cause = error.__cause__
+    if cause is not None and cause is not error and is_transient(cause):
+        return True
+    return type(error).__name__ in TRANSIENT_ERRORS
+
+
+# ----------------------------------------------------
+# Pooled HTTP session
+# ----------------------------------------------------
+_session = None
+_session_lock = threading.Lock()
+_hf_backend_warned = False
+
+
+def get_session(pool_connections: int = 4, pool_maxsize: int = 16) -> requests.Session:
+    """Return the process-wide keep-alive session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            # Retries are handled by ResilientCaller, not by urllib3
+            adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def install_hf_session(pool_connections: int = 4, pool_maxsize: int = 16) -> bool:
+    """
+    Make huggingface_hub reuse the pooled session for Inference API calls.
+    Returns False on huggingface_hub versions without a pluggable requests backend
+    (1.0 and later use httpx), in which case calls fall back to its own client.
+    """
+    global _hf_backend_warned
+    try:
+        from huggingface_hub import configure_http_backend
+    except ImportError:
+        if not _hf_backend_warned:
+            _hf_backend_warned = True
+            print("⚠️ This huggingface_hub has no configure_http_backend; embedding calls will not use the pooled session.")
+        return False
+    session = get_session(pool_connections, pool_maxsize)
+    configure_http_backend(backend_factory=lambda: session)
+    return True
+
+
+# ----------------------------------------------------
+# Deadlines, jittered retries and hedging
+# ----------------------------------------------------
+class ResilientCaller:
+    """
+    Run a model client call with an overall deadline, jittered retries on
+    transient errors and, optionally, a hedged duplicate request.
+
+    `timeout` is the per-attempt timeout handed to the underlying client;
+    `deadline` bounds the whole call including backoff. Attempts run on the
+    caller's own worker pool so the caller can stop waiting when the
+    deadline passes, even if the client is still blocked on the network.
+    The abandoned attempt finishes in the background within `timeout`.
+
+    With `hedge_delay` set, an attempt that has not answered after that many
+    seconds is duplicated and the first successful response wins. Hedges
+    are bounded: at most `max_hedges` may be in flight, and when a limiter
+    is passed to `call()` each hedge must also get a free slot from it, so
+    hedging never exceeds the admission limits. A hedge that cannot get a
+    slot is skipped. Abandoned attempts keep their limiter slot until they
+    finish, so deadline misses do not push upstream concurrency past it.
+    """
+    def __init__(
+        self,
+        name: str,
+        timeout: float = 30.0,
+        deadline: float = 60.0,
+        retries: int = 2,
+        backoff: float = 0.5,
+        max_backoff: float = 8.0,
+        hedge_delay: float = None,
+        max_hedges: int = 4,
+        max_workers: int = 32
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.deadline = deadline
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hedge_delay = hedge_delay or None
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-call")
+        self._hedge_slots = threading.BoundedSemaphore(max_hedges)
+        self._lock = threading.Lock()
+        self._stats = {
+            "calls": 0,
+            "failures": 0,
+            "retries": 0,
+            "hedges_fired": 0,
+            "hedges_skipped": 0,
+            "hedges_won": 0,
+            "deadline_exceeded": 0,
+        }
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _submit(self, fn):
+        """Run fn on the pool; the event is set once it has actually started."""
+        started = threading.Event()
+
+        def run():
+            started.set()
+            return fn()
+        return self._pool.submit(run), started
+
+    def _start_hedge(self, fn, limiter):
+        if not self._hedge_slots.acquire(blocking=False):
+            self._count("hedges_skipped")
+            return None
+        if limiter is not None and not limiter.try_acquire():
+            self._hedge_slots.release()
+            self._count("hedges_skipped")
+            return None
+
+        start = time.monotonic()
+
+        def release_slots(_):
+            if limiter is not None:
+                limiter.release(time.monotonic() - start)
+            self._hedge_slots.release()
+
+        self._count("hedges_fired")
+        hedge, _ = self._submit(fn)
+        hedge.add_done_callback(release_slots)
+        return hedge
+
+    def _attempt(self, fn, remaining: float, limiter, attempts: list):
+        end = time.monotonic() + remaining
+        primary, started = self._submit(fn)
+        attempts.append(primary)
+        pending = {primary}
+        hedge = None
+        # The hedge delay counts from when the primary starts, not from when it was queued
+        if self.hedge_delay and started.wait(max(end - time.monotonic(), 0)):
+            done, _ = wait(pending, timeout=min(self.hedge_delay, max(end - time.monotonic(), 0)))
+            if not done and time.monotonic() < end:
+                hedge = self._start_hedge(fn, limiter)
+                if hedge is not None:
+                    pending.add(hedge)
+
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=max(end - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+            if not done:
+                for future in pending:
+                    future.cancel()  # only drops attempts still queued; running ones finish within `timeout`
+                raise DeadlineExceeded(f"{self.name} call exceeded its {self.deadline}s deadline")
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self._count("hedges_won")
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def call(self, fn, limiter=None):
+        """
+        Call fn under the deadline and retry policy. With a limiter, the call
+        waits for one of its slots and keeps it until the last attempt has
+        actually finished upstream, even when it is abandoned at the deadline
+        or loses to a hedge; each hedge takes one more slot.
+        """
+        self._count("calls")
+        if limiter is not None:
+            limiter.acquire()
+        start = time.monotonic()
+        attempts = []
+        try:
+            return self._call(fn, limiter, start, attempts)
+        finally:
+            if limiter is not None:
+                # Earlier attempts have all finished; only the last one may still be running
+                self._release_when_done(limiter, attempts[-1] if attempts else None, start)
+
+    @staticmethod
+    def _release_when_done(limiter, future, start: float):
+        def release(_=None):
+            limiter.release(time.monotonic() - start)
+
+        if future is None:
+            release()
+        else:
+            future.add_done_callback(release)  # runs right away if the attempt is already done
+
+    def _call(self, fn, limiter, start: float, attempts: list):
+        attempt = 0
+        while True:
+            remaining = self.deadline - (time.monotonic() - start)
+            try:
+                return self._attempt(fn, remaining, limiter, attempts)
+            except DeadlineExceeded:
+                self._count("deadline_exceeded")
+                self._count("failures")
+                raise
+            except Exception as e:
+                if attempt >= self.retries or not is_transient(e):
+                    self._count("failures")
+                    raise
+                # Full jitter: sleep a random time up to the exponential backoff
+                delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+                remaining = self.deadline - (time.monotonic() - start)
+                if delay >= remaining:
+                    self._count("deadline_exceeded")
+                    self._count("failures")
+                    raise
+                self._count("retries")
+                attempt += 1
+                time.sleep(delay)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+
+# Process-wide callers, one per upstream client
+_callers = {}
+_callers_lock = threading.Lock()
+
+
+def get_caller(name: str, **settings) -> ResilientCaller:
+    """Return the shared caller called `name`, creating it on first use."""
+    with _callers_lock:
+        if name not in _callers:
+            _callers[name] = ResilientCaller(name, **settings)
+        return _callers[name]
+
+
+def caller_stats() -> dict:
+    with _callers_lock:
+        callers = list(_callers.values())
+    return {caller.name: caller.stats() for caller in callers}
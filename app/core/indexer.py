@@ -1,18 +1,54 @@
 import os
+from contextlib import nullcontext
 import numpy as np
 from huggingface_hub import InferenceClient
 from langchain_chroma import Chroma
+from app.core.quantized_index import INDEX_DTYPES, QuantizedVectorIndex
+
+def detach_chroma(persist_dir: str):
+    """
+    Remove Chroma's process-wide cached client for `persist_dir` and return
+    its system (or None). Later Chroma objects for the directory open a fresh
+    client; stores already open keep working until the system is stopped.
+    Uses a private Chroma API, hence best effort.
+    """
+    try:
+        from chromadb.api.shared_system_client import SharedSystemClient
+        return SharedSystemClient._identifier_to_system.pop(persist_dir, None)
+    except Exception:
+        return None
+
+
+def stop_chroma(system):
+    """Stop a system returned by detach_chroma(), releasing its caches and database handles."""
+    if system is None:
+        return
+    try:
+        system.stop()
+    except Exception as e:
+        print(f"⚠️ Failed to stop Chroma client: {e}")
+
 
 class HFInferenceEmbeddings:
     """Wrapper to use Hugging Face Inference API as LangChain embeddings."""
-    def __init__(self, model_name: str, hf_token: str, batch_size: int = 8):
-        self.client = InferenceClient(api_key=hf_token)
+    def __init__(self, model_name: str, hf_token: str, batch_size: int = 8, limiter=None, caller=None):
+        self.client = InferenceClient(api_key=hf_token, timeout=caller.timeout if caller else None)
         self.model_name = model_name
         self.batch_size = batch_size
+        self.limiter = limiter  # optional ConcurrencyLimiter around the inference call
+        self.caller = caller  # optional ResilientCaller for deadlines, retries and hedging
 
     def _embed_text(self, text):
-        res = self.client.feature_extraction(text, model=self.model_name)
-        emb = np.array(res, dtype=float)
+        def call():
+            return self.client.feature_extraction(text, model=self.model_name)
+
+        if self.caller:
+            # The caller holds the limiter slot until the upstream call really ends
+            res = self.caller.call(call, limiter=self.limiter)
+        else:
+            with self.limiter.slot() if self.limiter else nullcontext():
+                res = call()
+        emb = np.asarray(res, dtype=np.float32)
         if emb.ndim > 1:
             emb = emb[0]
         return emb
@@ -40,7 +76,12 @@ class Indexer:
         collection_name: str = "my_text_docs",
         hf_model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
         hf_token: str = None,
-        batch_size: int = 8
+        batch_size: int = 8,
+        limiter=None,
+        caller=None,
+        index_dtype: str = "float32",
+        rescore: int = 4,
+        embedding_model=None
     ):
         self.file_path = file_path
         self.urls = urls or []
@@ -51,19 +92,29 @@ class Indexer:
         self.hf_model_name = hf_model_name
         self.hf_token = hf_token or os.environ.get("HF_TOKEN")
         self.batch_size = batch_size
+        self.limiter = limiter
+        self.caller = caller
+        if index_dtype not in INDEX_DTYPES:
+            raise ValueError(f"index_dtype must be one of {INDEX_DTYPES}, got {index_dtype!r}")
+        self.index_dtype = index_dtype
+        self.rescore = rescore
         self.vectorstore = None
-        self.embedding_model = None
+        self.search_index = None
+        self.embedding_model = embedding_model
 
     def is_indexed(self) -> bool:
         """Check if an existing vectorstore is already persisted."""
-        return os.path.exists(self.persist_dir) and any(os.scandir(self.persist_dir))
+        # Look for Chroma's database rather than any file: persist_dir may also hold other tenants' indexes
+        return os.path.exists(os.path.join(self.persist_dir, "chroma.sqlite3"))
 
     def load_model(self):
         if self.embedding_model is None:
             self.embedding_model = HFInferenceEmbeddings(
                 model_name=self.hf_model_name,
                 hf_token=self.hf_token,
-                batch_size=self.batch_size
+                batch_size=self.batch_size,
+                limiter=self.limiter,
+                caller=self.caller
             )
         return self.embedding_model
 
@@ -109,10 +160,70 @@ class Indexer:
         )
         print("✅ Indexing completed and persisted.")
         self.vectorstore = vectorstore
-        return vectorstore
+        self.search_index = None
+        if self.index_dtype != "float32":
+            self.build_quantized_index()
+        return self.vectorstore
+
+    @property
+    def quantized_path(self) -> str:
+        return os.path.join(self.persist_dir, "quantized", f"{self.collection_name}-{self.index_dtype}")
+
+    def build_quantized_index(self):
+        """
+        Write the float16/int8 copy of the collection next to the Chroma files,
+        then close the Chroma store: queries only need the copy.
+        """
+        if self.vectorstore is None:
+            self.get_vectorstore()
+        index = QuantizedVectorIndex.from_vectorstore(self.vectorstore, self.index_dtype, self.rescore)
+        # Close Chroma before saving, so the copy is newer than anything Chroma writes on shutdown
+        self.close_vectorstore()
+        index.save(self.quantized_path)
+        print(f"✅ {self.index_dtype} index persisted ({index.memory_bytes()} bytes).")
+        del index
+        # Reload so the full-precision vectors are memory-mapped instead of held in RAM
+        self.search_index = QuantizedVectorIndex.load(self.quantized_path, self.embedding_model, self.rescore)
+        return self.search_index
+
+    def close_vectorstore(self):
+        """Drop the Chroma store and stop its cached client."""
+        self.vectorstore = None
+        stop_chroma(detach_chroma(self.persist_dir))
+
+    def close(self):
+        """Drop the open Chroma store and quantized copy; the next get_search_index() reopens them from disk."""
+        self.search_index = None
+        self.close_vectorstore()
+
+    def quantized_is_current(self) -> bool:
+        """Whether the quantized copy exists and was written after the Chroma database last changed."""
+        if not QuantizedVectorIndex.exists(self.quantized_path):
+            return False
+        written = os.path.getmtime(os.path.join(self.quantized_path, "docs.json"))
+        return written >= os.path.getmtime(os.path.join(self.persist_dir, "chroma.sqlite3"))
+
+    def get_search_index(self):
+        """Return what queries should run against: the Chroma store or its quantized copy."""
+        if self.index_dtype == "float32":
+            return self.vectorstore if self.vectorstore is not None else self.get_vectorstore()
+        if self.search_index is None:
+            if not self.is_indexed():
+                self.get_vectorstore()  # builds the Chroma store and the quantized copy
+            elif self.quantized_is_current():
+                # Chroma is not opened at all when an up-to-date copy is on disk
+                self.load_model()
+                self.search_index = QuantizedVectorIndex.load(self.quantized_path, self.embedding_model, self.rescore)
+            else:
+                self.build_quantized_index()
+        return self.search_index
 
     def get_vectorstore(self):
-        """Return a Chroma vectorstore — either loads an existing one or builds a new one."""
+        """
+        Return a Chroma vectorstore — either loads an existing one or builds a new one.
+        In float16/int8 mode a newly built store is closed once its quantized copy is
+        written, so this returns None; use get_search_index() for queries.
+        """
         self.load_model()  # Ensure embedding model is initialized
         if self.is_indexed():
             print("📂 Loading existing index...")
@@ -124,6 +235,6 @@ class Indexer:
         else:
             print("⚙️ Building new index...")
             docs_splits = self.load_and_split()
-            self.vectorstore = self.build_vectorstore(docs_splits)
+            self.build_vectorstore(docs_splits)
 
         return self.vectorstore
@@ -1,16 +1,34 @@
+from contextlib import nullcontext
 from langchain_google_genai import ChatGoogleGenerativeAI
 
 class LLM_Agent:
-    def __init__(self, model_name="gemini-2.5-flash", temperature=1):
-        self.llm = ChatGoogleGenerativeAI(model=model_name, temperature=temperature)
+    def __init__(self, model_name="gemini-2.5-flash", temperature=1, limiter=None, caller=None, llm=None):
+        if llm is not None:
+            self.llm = llm  # share an existing chat client instead of creating one
+        elif caller:
+            # Retries are done by the caller; the client only enforces the per-attempt timeout
+            self.llm = ChatGoogleGenerativeAI(
+                model=model_name, temperature=temperature, timeout=caller.timeout, max_retries=0
+            )
+        else:
+            self.llm = ChatGoogleGenerativeAI(model=model_name, temperature=temperature)
         self.memory = {}  # dictionary to store memory per user_id
+        self.limiter = limiter  # optional ConcurrencyLimiter around llm.invoke
+        self.caller = caller  # optional ResilientCaller for deadlines and retries
 
-    def ask(self, user_id: str, question: str, documents: list) -> str:
+    def history(self, user_id: str) -> list:
+        """Return the (role, message) pairs stored for a user."""
         if user_id not in self.memory:
             self.memory[user_id] = []
+        return self.memory[user_id]
 
-        conversation_history = self.memory[user_id]
+    def remember(self, user_id: str, question: str, answer: str):
+        conversation_history = self.history(user_id)
+        conversation_history.append(("user", question))
+        conversation_history.append(("assistant", answer))
 
+    def generate(self, question: str, documents: list, conversation_history: list) -> str:
+        """Call the LLM for a question without touching the stored memory."""
         docs_string = "".join([doc.page_content for doc in documents])
         previous_messages = "\n".join([f"{role}: {msg}" for role, msg in conversation_history])
 
@@ -26,14 +44,22 @@ Previous conversation:
 Documents:
 {docs_string}"""
 
-        ai_msg = self.llm.invoke([
+        messages = [
             {"role": "system", "content": instructions},
             {"role": "user", "content": question},
-        ])
+        ]
+        if self.caller:
+            # The caller holds the limiter slot until the upstream call really ends
+            ai_msg = self.caller.call(lambda: self.llm.invoke(messages), limiter=self.limiter)
+        else:
+            with self.limiter.slot() if self.limiter else nullcontext():
+                ai_msg = self.llm.invoke(messages)
+        return ai_msg.content
+
+    def ask(self, user_id: str, question: str, documents: list) -> str:
+        answer = self.generate(question, documents, self.history(user_id))
 
         # Save to memory
-        conversation_history.append(("user", question))
-        conversation_history.append(("assistant", ai_msg.content))
-        self.memory[user_id] = conversation_history
+        self.remember(user_id, question, answer)
 
-        return ai_msg.content
+        return answer
@@ -1,7 +1,10 @@
 import app.config
+from app.core.admission import UserLimitError, current_user, get_limiter
+from app.core.http_client import get_caller, install_hf_session
 from app.core.indexer import Indexer
 from app.core.retriever import Retriever
 from app.core.llm_agent import LLM_Agent
+from app.core.single_flight import SingleFlight
 
 class Personalized_RAG:
     def __init__(
@@ -9,36 +12,95 @@ class Personalized_RAG:
         file_path: str,
         user_id: str = "terminal_user",
         persist_dir: str = "./chroma_db",
-        urls: list = None
+        urls: list = None,
+        index_dtype: str = None,
+        collection_name: str = "my_text_docs",
+        llm=None,
+        embedding_model=None
     ):
         self.user_id = user_id
-        self.indexer = Indexer(file_path=file_path, persist_dir=persist_dir, urls=urls)
+        install_hf_session(**app.config.HTTP_POOL)
+        self.indexer = Indexer(
+            file_path=file_path,
+            persist_dir=persist_dir,
+            urls=urls,
+            collection_name=collection_name,
+            embedding_model=embedding_model,
+            limiter=get_limiter("embedding", **app.config.EMBEDDING_LIMITS),
+            caller=get_caller("embedding", **app.config.EMBEDDING_CLIENT),
+            index_dtype=index_dtype or app.config.INDEX_DTYPE,
+            rescore=app.config.INDEX_RESCORE,
+        )
         self.vectorstore = None
         self.retriever = None
-        self.agent = LLM_Agent()
+        self.agent = LLM_Agent(
+            limiter=get_limiter("llm", **app.config.LLM_LIMITS),
+            caller=get_caller("llm", **app.config.LLM_CLIENT),
+            llm=llm,
+        )
+        # Identical questions asked concurrently share one embedding/search/LLM call
+        self._retrievals = SingleFlight()
+        self._generations = SingleFlight()
 
         # Try to load existing vectorstore if available
         if self.indexer.is_indexed():
             print("📂 Loading existing index...")
-            self.vectorstore = self.indexer.get_vectorstore()
-            self.retriever = Retriever(self.vectorstore)
+            self._open_index()
         else:
             print("⚠️ No existing index found. Call `.index()` to create one.")
         print("🚀 Personalized_RAG initialized.")
 
     def index(self):
-        """Manually build or rebuild the vectorstore."""
+        """
+        Manually build or reload the index: closes what is open, then reopens it
+        from disk, building the vectorstore when missing and rewriting a stale
+        float16/int8 copy.
+        """
         print("⚙️ Starting indexing process...")
-        self.vectorstore = self.indexer.get_vectorstore()
-        self.retriever = Retriever(self.vectorstore)
+        self.indexer.close()
+        self._open_index()
         print("✅ Indexing complete. System ready for queries.")
 
-    def ask(self, question: str):
-        """Ask a question after ensuring the system is indexed."""
-        if not self.vectorstore:
+    def _open_index(self):
+        self.retriever = Retriever(self.indexer.get_search_index())
+        # None in float16/int8 mode, where queries only touch the quantized copy
+        self.vectorstore = self.indexer.vectorstore
+
+    def ask(self, question: str, user_id: str = None, history: list = None):
+        """
+        Ask a question after ensuring the system is indexed.
+        `history` is an optional caller-owned list of (role, message) pairs used
+        (and extended) instead of the agent's per-user memory.
+        """
+        if not self.retriever:
             return "❌ No index found. Please run `.index()` before asking questions."
-        docs_retrieved = self.retriever.retrieve(question)
-        return self.agent.ask(self.user_id, question, docs_retrieved)
+        user_id = user_id or self.user_id
+        current_user.set(user_id)  # per-user fairness in the model client limiters
+        if history is None:
+            history = self.agent.history(user_id)
+        conversation_history = tuple(history)
+        query = " ".join(question.split())
+
+        # Retrieval only depends on the question; the answer also depends on
+        # the conversation so far, so both are part of the generation key.
+        retriever = self.retriever
+        # A per-user (429) rejection is about the leader's own admission, so
+        # waiters go through admission themselves instead of inheriting it.
+        # A full or timed-out queue (503) is shared like any other error.
+        docs_retrieved = self._retrievals.do(
+            (id(retriever), query),
+            lambda: retriever.retrieve(query),
+            retry_on=(UserLimitError,),
+        )
+        answer = self._generations.do(
+            (id(retriever), query, conversation_history),
+            lambda: self.agent.generate(question, docs_retrieved, conversation_history),
+            retry_on=(UserLimitError,),
+        )
+
+        history.append(("user", question))
+        history.append(("assistant", answer))
+        return answer
 
 
 if __name__ == "__main__":
@@ -0,0 +1,159 @@
+import cProfile
+import io
+import os
+import pstats
+import random
+import re
+import shutil
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from uuid import uuid4
+
+PROFILE_HEADER = "X-Profile"
+# Files written for every profiled request, served by the download endpoint
+ARTIFACTS = {
+    "cpu.prof": "application/octet-stream",           # pstats dump (snakeviz, pstats)
+    "memory.snapshot": "application/octet-stream",    # tracemalloc.Snapshot.load()
+    "report.txt": "text/plain",
+}
+PROFILE_ID_PATTERN = re.compile(r"^[0-9]{8}-[0-9]{6}-[a-z_]+-[0-9a-f]{8}$")
+
+
+class ProfileSession:
+    def __init__(self, profile_id: str, name: str):
+        self.profile_id = profile_id
+        self.name = name
+
+
+class RequestProfiler:
+    """
+    Opt-in CPU profile and allocation trace of a single request.
+
+    A request is profiled when it carries the `X-Profile` header set to
+    `token`, or when it is picked by `sample_rate`. With no token and a
+    zero sample rate, `profile()` returns a null context and nothing is
+    traced. tracemalloc is process-wide, so only one request is profiled
+    at a time; others run normally while a profile is in progress.
+    The CPU profile covers the handler thread only.
+    """
+    def __init__(
+        self,
+        output_dir: str = "./profiles",
+        sample_rate: float = 0.0,
+        token: str = None,
+        max_profiles: int = 20,
+        top: int = 25,
+        trace_frames: int = 10
+    ):
+        self.output_dir = output_dir
+        self.sample_rate = sample_rate
+        self.token = token
+        self.max_profiles = max_profiles
+        self.top = top
+        self.trace_frames = trace_frames
+        self._busy = threading.Lock()
+
+    def downloads_enabled(self) -> bool:
+        """Artifacts are only served when a token is configured to protect them."""
+        return bool(self.token)
+
+    def authorized(self, header_value: str = None) -> bool:
+        """Whether a caller may list and download artifacts; never without a configured token."""
+        return self.downloads_enabled() and header_value == self.token
+
+    def should_profile(self, header_value: str = None) -> bool:
+        if self.token and header_value == self.token:
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def profile(self, name: str, enabled: bool):
+        """Context manager yielding a ProfileSession, or None when not profiling."""
+        if not enabled or not self._busy.acquire(blocking=False):
+            return nullcontext()
+        return self._profile(name)
+
+    @contextmanager
+    def _profile(self, name: str):
+        session = ProfileSession(f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{uuid4().hex[:8]}", name)
+        profiler = cProfile.Profile()
+        started_tracing = not tracemalloc.is_tracing()
+        try:
+            if started_tracing:
+                tracemalloc.start(self.trace_frames)
+            tracemalloc.reset_peak()
+            start = time.perf_counter()
+            profiler.enable()
+            try:
+                yield session
+            finally:
+                profiler.disable()
+                elapsed = time.perf_counter() - start
+                snapshot = tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+                if started_tracing:
+                    tracemalloc.stop()
+                self._write(session, profiler, snapshot, elapsed, peak)
+        finally:
+            self._busy.release()
+
+    # ----------------------------------------------------
+    # Artifacts
+    # ----------------------------------------------------
+    def _write(self, session, profiler, snapshot, elapsed: float, peak: int):
+        # Runs while the request unwinds: a failure here must not replace its response or error
+        path = os.path.join(self.output_dir, session.profile_id)
+        try:
+            os.makedirs(path, exist_ok=True)
+            profiler.dump_stats(os.path.join(path, "cpu.prof"))
+            snapshot.dump(os.path.join(path, "memory.snapshot"))
+            with open(os.path.join(path, "report.txt"), "w", encoding="utf-8") as f:
+                f.write(self.report(session, profiler, snapshot, elapsed, peak))
+            self._prune()
+        except Exception as e:
+            print(f"⚠️ Failed to write profile {session.profile_id} to {path}: {e}")
+            return
+        print(f"🔬 Profile {session.profile_id} written to {path}")
+
+    def report(self, session, profiler, snapshot, elapsed: float, peak: int) -> str:
+        out = io.StringIO()
+        out.write(f"Profile {session.profile_id} ({session.name})\n")
+        out.write(f"Wall time: {elapsed * 1000:.1f} ms\n")
+        out.write(f"Peak traced memory: {peak / 1024 / 1024:.2f} MiB\n\n")
+
+        stats = pstats.Stats(profiler, stream=out)
+        out.write("== Pipeline stages (app code, cumulative) ==\n")
+        stats.sort_stats("cumulative").print_stats(re.escape(os.sep + "app" + os.sep), self.top)
+        out.write("== Top functions (cumulative) ==\n")
+        stats.sort_stats("cumulative").print_stats(self.top)
+
+        out.write("== Top allocations still alive at the end of the request ==\n")
+        snapshot = snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ])
+        for stat in snapshot.statistics("traceback")[:self.top]:
+            out.write(f"{stat.size / 1024:.1f} KiB in {stat.count} blocks\n")
+            for line in stat.traceback.format(limit=3):
+                out.write(f"    {line}\n")
+        return out.getvalue()
+
+    def _prune(self):
+        profiles = sorted(
+            self.list_profiles(), key=lambda name: os.path.getmtime(os.path.join(self.output_dir, name))
+        )
+        for profile_id in profiles[:-self.max_profiles]:
+            shutil.rmtree(os.path.join(self.output_dir, profile_id), ignore_errors=True)
+
+    def list_profiles(self) -> list:
+        if not os.path.isdir(self.output_dir):
+            return []
+        return [name for name in os.listdir(self.output_dir) if PROFILE_ID_PATTERN.match(name)]
+
+    def artifact_path(self, profile_id: str, artifact: str):
+        """Path of an existing artifact, or None for unknown ids/artifacts."""
+        if not PROFILE_ID_PATTERN.match(profile_id) or artifact not in ARTIFACTS:
+            return None
+        path = os.path.join(self.output_dir, profile_id, artifact)
+        return path if os.path.isfile(path) else None
@@ -0,0 +1,170 @@
+import json
+import os
+import numpy as np
+
+INDEX_DTYPES = ("float32", "float16", "int8")
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def quantize(vectors: np.ndarray, dtype: str):
+    """Return (codes, scales) for unit vectors; scales is None for float16."""
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    if dtype == "int8":
+        # Symmetric per-vector scale so the largest component maps to ±127
+        scales = np.abs(vectors).max(axis=1, initial=0.0) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    raise ValueError(f"Unsupported index dtype {dtype!r}, expected one of {INDEX_DTYPES[1:]}")
+
+
+class _QuantizedRetriever:
+    """Minimal retriever exposing the `invoke` method used by Retriever."""
+    def __init__(self, index, k: int = 4):
+        self.index = index
+        self.k = k
+
+    def invoke(self, query: str):
+        return self.index.similarity_search(query, k=self.k)
+
+
+class QuantizedVectorIndex:
+    """
+    Compact in-memory cosine index over float16 or int8 vectors.
+
+    Search scans the compact codes, keeps the best `k * rescore` candidates
+    and re-ranks them against the full-precision vectors. When the index is
+    loaded from disk the float32 copy is memory-mapped, so only the rows of
+    the candidates are actually read.
+    """
+    # Rows scored per block, bounds the temporary float32 copy during a scan
+    block_size = 4096
+
+    def __init__(self, codes, scales, full, texts, metadatas, dtype, embedding_function=None, rescore=4):
+        self.codes = codes
+        self.scales = scales
+        self.full = full
+        self.texts = texts
+        self.metadatas = metadatas
+        self.dtype = dtype
+        self.embedding_function = embedding_function
+        self.rescore = rescore
+
+    @classmethod
+    def build(cls, embeddings, texts, metadatas=None, dtype="int8", embedding_function=None, rescore=4):
+        full = np.asarray(embeddings, dtype=np.float32)
+        full = _normalize(full.reshape(len(texts), -1) if len(texts) else full.reshape(0, 0))
+        codes, scales = quantize(full, dtype)
+        metadatas = metadatas or [{} for _ in texts]
+        return cls(codes, scales, full, list(texts), list(metadatas), dtype, embedding_function, rescore)
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore, dtype="int8", rescore=4):
+        """Build the compact index from the vectors already stored in a Chroma collection."""
+        data = vectorstore.get(include=["embeddings", "documents", "metadatas"])
+        return cls.build(
+            data["embeddings"],
+            data["documents"],
+            data["metadatas"],
+            dtype=dtype,
+            embedding_function=vectorstore.embeddings,
+            rescore=rescore,
+        )
+
+    def save(self, path: str):
+        """
+        Write the index files. Each file is replaced atomically and docs.json,
+        which exists() checks, goes last, so a copy that is still memory-mapped
+        by a loaded index is never truncated under it.
+        """
+        os.makedirs(path, exist_ok=True)
+
+        def save_array(name, array):
+            tmp = os.path.join(path, f"{name}.tmp.npy")
+            np.save(tmp, array)
+            os.replace(tmp, os.path.join(path, f"{name}.npy"))
+
+        save_array("codes", self.codes)
+        save_array("full", self.full)
+        if self.scales is not None:
+            save_array("scales", self.scales)
+        elif os.path.exists(os.path.join(path, "scales.npy")):
+            os.remove(os.path.join(path, "scales.npy"))
+        tmp = os.path.join(path, "docs.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"dtype": self.dtype, "texts": self.texts, "metadatas": self.metadatas}, f)
+        os.replace(tmp, os.path.join(path, "docs.json"))
+
+    @classmethod
+    def load(cls, path: str, embedding_function=None, rescore=4):
+        with open(os.path.join(path, "docs.json"), encoding="utf-8") as f:
+            docs = json.load(f)
+        scales_path = os.path.join(path, "scales.npy")
+        return cls(
+            codes=np.load(os.path.join(path, "codes.npy")),
+            scales=np.load(scales_path) if os.path.exists(scales_path) else None,
+            full=np.load(os.path.join(path, "full.npy"), mmap_mode="r"),
+            texts=docs["texts"],
+            metadatas=docs["metadatas"],
+            dtype=docs["dtype"],
+            embedding_function=embedding_function,
+            rescore=rescore,
+        )
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.exists(os.path.join(path, "docs.json"))
+
+    def memory_bytes(self) -> int:
+        """Bytes held in memory for search (the memory-mapped float32 copy is not counted)."""
+        size = self.codes.nbytes
+        if self.scales is not None:
+            size += self.scales.nbytes
+        return size
+
+    def approximate_scores(self, query: np.ndarray) -> np.ndarray:
+        scores = np.empty(len(self.codes), dtype=np.float32)
+        for start in range(0, len(self.codes), self.block_size):
+            block = self.codes[start:start + self.block_size].astype(np.float32)
+            scores[start:start + len(block)] = block @ query
+        if self.scales is not None:
+            scores *= self.scales
+        return scores
+
+    def search_by_vector(self, vector, k: int = 4, rescore: int = None):
+        """Return [(row, cosine_score)] of the k nearest rows."""
+        n = len(self.codes)
+        if n == 0:
+            return []
+        query = _normalize(np.asarray(vector, dtype=np.float32).ravel())
+        k = min(k, n)
+        rescore = self.rescore if rescore is None else rescore
+
+        scores = self.approximate_scores(query)
+        n_candidates = min(n, k * max(rescore, 1))
+        candidates = np.argpartition(-scores, n_candidates - 1)[:n_candidates]
+        if rescore:
+            rows = np.sort(candidates)  # sorted reads are friendlier to the memory map
+            scores = np.asarray(self.full[rows], dtype=np.float32) @ query
+            candidates = rows
+        else:
+            scores = scores[candidates]
+        order = np.argsort(-scores)[:k]
+        return [(int(candidates[i]), float(scores[i])) for i in order]
+
+    def similarity_search(self, query: str, k: int = 4):
+        from langchain_core.documents import Document
+        vector = self.embedding_function.embed_query(query)
+        return [
+            Document(page_content=self.texts[row], metadata=self.metadatas[row] or {})
+            for row, _ in self.search_by_vector(vector, k)
+        ]
+
+    def as_retriever(self, search_kwargs: dict = None):
+        return _QuantizedRetriever(self, **(search_kwargs or {}))
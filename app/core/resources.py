@@ -0,0 +1,35 @@
+import threading
+
+import app.config
+from app.core.tenants import TenantRegistry
+
+# One registry per process: every API request and Streamlit session shares the
+# same indexes and model clients; callers keep only their conversation state.
+_tenants = None
+_tenants_lock = threading.Lock()
+
+
+def get_tenant_registry() -> TenantRegistry:
+    """Return the process-wide TenantRegistry, creating it on first use."""
+    global _tenants
+    with _tenants_lock:
+        if _tenants is None:
+            _tenants = TenantRegistry(
+                default_file_path="data/user_information/",
+                data_dir=app.config.TENANTS_DATA_DIR,
+                persist_dir="./chroma_db",
+                default_urls=app.config.DEFAULT_TENANT_URLS,
+                **app.config.TENANT_CACHE,
+            )
+            _tenants.start_janitor()
+        return _tenants
+
+
+def get_rag(tenant_id: str = None):
+    """Shortcut for the shared Personalized_RAG of a tenant (the default one if omitted)."""
+    return get_tenant_registry().get(tenant_id)
+
+
+def use_rag(tenant_id: str = None):
+    """Context manager around a tenant's RAG that keeps it usable until the block exits."""
+    return get_tenant_registry().use(tenant_id)
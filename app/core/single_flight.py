@@ -0,0 +1,68 @@
+import threading
+
+
+class _Call:
+    """A computation that is currently in flight for a given key."""
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share the same key.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is still running block and receive the same result
+    (or the same exception). Once the call finishes the key is forgotten,
+    so later calls compute a fresh value — this is not a cache.
+
+    Errors listed in `retry_on` are not shared: waiters whose leader failed
+    with one of them go through do() again, so one of them becomes the new
+    leader and the rest coalesce on it. This is meant for rejections that
+    concern the leader only, such as a per-user admission limit.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = {"leaders": 0, "coalesced": 0, "retried": 0}
+
+    def do(self, key, fn, retry_on: tuple = ()):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.stats["coalesced"] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.stats["leaders"] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                if retry_on and isinstance(call.error, retry_on):
+                    with self._lock:
+                        self.stats["retried"] += 1
+                    return self.do(key, fn, retry_on)
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
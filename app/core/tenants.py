@@ -0,0 +1,263 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from app.core.indexer import detach_chroma, stop_chroma
+from app.core.personalized_rag import Personalized_RAG
+from app.core.single_flight import SingleFlight
+
+DEFAULT_TENANT = "default"
+# Tenant collections are named "tenant_<id>"; Chroma wants 3-63 characters that start and end alphanumeric
+TENANT_ID_PATTERN = re.compile(r"^[a-z0-9](?:[a-z0-9_-]{0,54}[a-z0-9])?$")
+
+
+class UnknownTenantError(KeyError):
+    """Raised for a tenant that has neither source documents nor a persisted index."""
+
+
+def _footprint(path: str, skip: str = None) -> int:
+    """Bytes of the index files under `path`, used as an estimate of its memory use."""
+    total = 0
+    for root, dirs, files in os.walk(path):
+        if skip:
+            dirs[:] = [d for d in dirs if os.path.join(root, d) != skip]
+        for name in files:
+            # Metadata and the memory-mapped full-precision vectors stay on disk
+            if name not in ("chroma.sqlite3", "full.npy"):
+                total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+class _OpenTenant:
+    def __init__(self, rag, footprint: int):
+        self.rag = rag
+        self.footprint = footprint
+        self.last_used = time.monotonic()
+        self.in_use = 0  # requests currently running against this tenant
+        self.closed = False
+        self.chroma = None  # Chroma system detached on close, stopped once in_use drops to 0
+
+
+class TenantRegistry:
+    """
+    Route requests to per-tenant Personalized_RAG instances.
+
+    Each tenant reads its documents from `data_dir/<tenant_id>/` (plus an
+    optional `urls.txt`, one URL per line) and persists its own collection
+    under `persist_dir/tenants/<tenant_id>/`. The default tenant keeps the
+    original single-user layout. Tenants are opened lazily on first use and
+    kept in an LRU bounded by `max_open` and by `max_bytes` of index files;
+    tenants idle for more than `idle_ttl` seconds are closed by a background
+    janitor (see start_janitor()). A closed tenant's Chroma client is stopped
+    once the requests running against it through use() have finished. All
+    tenants share one chat client and one embedding client.
+    """
+    def __init__(
+        self,
+        default_file_path: str = "data/user_information/",
+        data_dir: str = "data/tenants",
+        persist_dir: str = "./chroma_db",
+        default_urls: list = None,
+        max_open: int = 8,
+        max_bytes: int = 256 * 1024 * 1024,
+        idle_ttl: float = 900.0,
+        index_dtype: str = None
+    ):
+        self.default_file_path = default_file_path
+        self.data_dir = data_dir
+        self.persist_dir = persist_dir
+        self.default_urls = default_urls
+        self.max_open = max_open
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self.index_dtype = index_dtype
+
+        self._lock = threading.Lock()
+        self._open = OrderedDict()  # tenant_id -> _OpenTenant, least recently used first
+        self._loads = SingleFlight()
+        self._llm = None
+        self._embedding_model = None
+        self._evictions = 0
+        self._janitor = None
+
+    # ----------------------------------------------------
+    # Tenant layout
+    # ----------------------------------------------------
+    def validate(self, tenant_id: str = None) -> str:
+        tenant_id = (tenant_id or DEFAULT_TENANT).lower()
+        if not TENANT_ID_PATTERN.match(tenant_id):
+            raise ValueError(f"Invalid tenant id {tenant_id!r}")
+        return tenant_id
+
+    def tenant_persist_dir(self, tenant_id: str) -> str:
+        if tenant_id == DEFAULT_TENANT:
+            return self.persist_dir
+        return os.path.join(self.persist_dir, "tenants", tenant_id)
+
+    def tenant_file_path(self, tenant_id: str) -> str:
+        if tenant_id == DEFAULT_TENANT:
+            return self.default_file_path
+        return os.path.join(self.data_dir, tenant_id)
+
+    def tenant_urls(self, tenant_id: str) -> list:
+        if tenant_id == DEFAULT_TENANT:
+            return self.default_urls
+        urls_file = os.path.join(self.tenant_file_path(tenant_id), "urls.txt")
+        if not os.path.isfile(urls_file):
+            return None
+        with open(urls_file, encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+    def exists(self, tenant_id: str) -> bool:
+        return os.path.exists(self.tenant_file_path(tenant_id)) or os.path.exists(
+            os.path.join(self.tenant_persist_dir(tenant_id), "chroma.sqlite3")
+        )
+
+    def _measure(self, tenant_id: str) -> int:
+        skip = os.path.join(self.persist_dir, "tenants") if tenant_id == DEFAULT_TENANT else None
+        return _footprint(self.tenant_persist_dir(tenant_id), skip=skip)
+
+    # ----------------------------------------------------
+    # Open / evict
+    # ----------------------------------------------------
+    def _load(self, tenant_id: str):
+        with self._lock:
+            entry = self._open.get(tenant_id)
+            if entry is not None:  # opened by a load that finished just before this one started
+                return entry.rag
+        print(f"📂 Opening tenant '{tenant_id}'...")
+        rag = Personalized_RAG(
+            file_path=self.tenant_file_path(tenant_id),
+            user_id="default_user",
+            persist_dir=self.tenant_persist_dir(tenant_id),
+            urls=self.tenant_urls(tenant_id),
+            index_dtype=self.index_dtype,
+            collection_name="my_text_docs" if tenant_id == DEFAULT_TENANT else f"tenant_{tenant_id}",
+            llm=self._llm,
+            embedding_model=self._embedding_model,
+        )
+        # The first tenant opened provides the clients every later tenant reuses
+        if self._llm is None:
+            self._llm = rag.agent.llm
+        if self._embedding_model is None:
+            self._embedding_model = rag.indexer.load_model()
+
+        entry = _OpenTenant(rag, self._measure(tenant_id))
+        with self._lock:
+            self._open[tenant_id] = entry
+            self._open.move_to_end(tenant_id)
+            self._evict_locked(keep=tenant_id)
+        return rag
+
+    def _close_locked(self, tenant_id: str):
+        entry = self._open.pop(tenant_id)
+        entry.closed = True
+        # A reopened tenant gets a fresh client; this one is stopped when no request uses it
+        entry.chroma = detach_chroma(self.tenant_persist_dir(tenant_id))
+        if entry.in_use == 0:
+            stop_chroma(entry.chroma)
+        self._evictions += 1
+        print(f"🧹 Closed tenant '{tenant_id}'.")
+
+    def _evict_locked(self, keep: str = None):
+        now = time.monotonic()
+        for tenant_id, entry in list(self._open.items()):
+            if tenant_id != keep and now - entry.last_used > self.idle_ttl:
+                self._close_locked(tenant_id)
+        while len(self._open) > 1 and (
+            len(self._open) > self.max_open
+            or sum(entry.footprint for entry in self._open.values()) > self.max_bytes
+        ):
+            oldest = next(iter(self._open))
+            if oldest == keep:
+                break
+            self._close_locked(oldest)
+
+    def _touch_locked(self, tenant_id: str):
+        entry = self._open.get(tenant_id)
+        if entry is not None:
+            entry.last_used = time.monotonic()
+            self._open.move_to_end(tenant_id)
+            self._evict_locked(keep=tenant_id)
+        return entry
+
+    def get(self, tenant_id: str = None) -> Personalized_RAG:
+        """
+        Return the tenant's RAG, opening it on first use. The RAG may be closed
+        at any time afterwards; wrap queries in use() instead.
+        """
+        tenant_id = self.validate(tenant_id)
+        with self._lock:
+            entry = self._touch_locked(tenant_id)
+            if entry is not None:
+                return entry.rag
+        if not self.exists(tenant_id):
+            raise UnknownTenantError(tenant_id)
+        # Concurrent first requests for a tenant share a single load
+        return self._loads.do(tenant_id, lambda: self._load(tenant_id))
+
+    @contextmanager
+    def use(self, tenant_id: str = None):
+        """Yield the tenant's RAG, keeping its Chroma client alive until the block exits."""
+        tenant_id = self.validate(tenant_id)
+        while True:
+            self.get(tenant_id)
+            with self._lock:
+                # Re-read under the lock: the tenant may have been evicted right after get()
+                entry = self._touch_locked(tenant_id)
+                if entry is not None:
+                    entry.in_use += 1
+                    break
+        try:
+            yield entry.rag
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                if entry.closed and entry.in_use == 0:
+                    stop_chroma(entry.chroma)
+
+    def reindex(self, tenant_id: str = None) -> Personalized_RAG:
+        tenant_id = self.validate(tenant_id)
+        with self.use(tenant_id) as rag:
+            rag.index()
+        with self._lock:
+            entry = self._open.get(tenant_id)
+            if entry is not None:
+                entry.footprint = self._measure(tenant_id)
+                self._evict_locked(keep=tenant_id)
+        return rag
+
+    def evict_idle(self):
+        with self._lock:
+            self._evict_locked()
+
+    def start_janitor(self, interval: float = None):
+        """Close idle tenants from a daemon thread every `interval` seconds (default: idle_ttl / 2, at most 60)."""
+        with self._lock:
+            if self._janitor is not None:
+                return
+            interval = interval or max(1.0, min(self.idle_ttl / 2, 60.0))
+
+            def run():
+                while True:
+                    time.sleep(interval)
+                    try:
+                        self.evict_idle()
+                    except Exception as e:
+                        print(f"⚠️ Tenant eviction failed: {e}")
+
+            self._janitor = threading.Thread(target=run, name="tenant-janitor", daemon=True)
+            self._janitor.start()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "open": list(self._open),
+                "open_bytes": sum(entry.footprint for entry in self._open.values()),
+                "max_open": self.max_open,
+                "max_bytes": self.max_bytes,
+                "evictions": self._evictions,
+            }
@@ -1,10 +1,17 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import ExitStack, contextmanager
+from fastapi import FastAPI, Header, HTTPException, Query, Response
+from fastapi.responses import FileResponse
 # from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional
 from uuid import uuid4
 
-from app.core.personalized_rag import Personalized_RAG
+from app.config import PROFILING
+from app.core.admission import OverloadedError, limiter_stats
+from app.core.http_client import caller_stats
+from app.core.profiling import ARTIFACTS, RequestProfiler
+from app.core.resources import get_tenant_registry
+from app.core.tenants import DEFAULT_TENANT, UnknownTenantError
 
 # ----------------------------------------------------
 # Initialize FastAPI app
@@ -24,6 +31,7 @@ app = FastAPI(title="Joel's Assistant API", version="1.1")
 # ----------------------------------------------------
 class QuestionRequest(BaseModel):
     user_id: Optional[str] = None
+    tenant_id: Optional[str] = None
     question: str
 
 class AskResponse(BaseModel):
@@ -33,11 +41,34 @@ class AskResponse(BaseModel):
 # ----------------------------------------------------
 # Initialize the RAG system
 # ----------------------------------------------------
-rag = Personalized_RAG(
-    file_path="data/user_information/",
-    user_id="default_user",
-    persist_dir="./chroma_db",
-)
+# Shared with the Streamlit front-ends when they run in the same process.
+# Tenants are opened lazily; only the default one is warmed up at startup.
+tenants = get_tenant_registry()
+tenants.get(DEFAULT_TENANT)
+
+# Disabled (no tracing at all) unless PROFILE_TOKEN or PROFILE_SAMPLE_RATE is set
+profiler = RequestProfiler(**PROFILING)
+
+def get_rag(tenant_id: Optional[str]):
+    """Resolve a tenant id to its RAG instance, or fail with 400/404."""
+    try:
+        return tenants.get(tenant_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UnknownTenantError:
+        raise HTTPException(status_code=404, detail=f"Unknown tenant '{tenant_id}'.")
+
+@contextmanager
+def use_rag(tenant_id: Optional[str]):
+    """Like get_rag, but keeps the tenant's index open until the request is done."""
+    with ExitStack() as stack:
+        try:
+            rag = stack.enter_context(tenants.use(tenant_id))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except UnknownTenantError:
+            raise HTTPException(status_code=404, detail=f"Unknown tenant '{tenant_id}'.")
+        yield rag
 
 # ----------------------------------------------------
 # API Endpoints
@@ -53,39 +84,52 @@ async def healthcheck():
     Used by uptime monitors to keep the app alive and verify basic functionality.
     """
     try:
-        # Optional: you can check if indexer is accessible
-        _ = rag.user_id  # touch a simple property to ensure rag is initialized
+        _ = tenants.stats()  # touch the registry to ensure it is initialized
         return {"status": "ok", "service": "joel-assistant", "version": "1.1"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Healthcheck failed: {e}")
 
 @app.get("/status")
-async def status():
-    """Check if the system has an existing index."""
+def status(tenant_id: Optional[str] = Query(default=None)):
+    """Check if the tenant has an existing index."""
+    rag = get_rag(tenant_id)
     indexed = rag.indexer.is_indexed()
-    return {"indexed": indexed, "user_id": rag.user_id}
+    return {"indexed": indexed, "tenant_id": tenants.validate(tenant_id), "user_id": rag.user_id}
+
+@app.get("/metrics")
+async def metrics():
+    """Limiter queue depth and wait times, plus retry/hedge counters of the model clients."""
+    return {"limiters": limiter_stats(), "clients": caller_stats(), "tenants": tenants.stats()}
 
 @app.post("/ask", response_model=AskResponse)
-def ask_question(request: QuestionRequest):
+def ask_question(
+    request: QuestionRequest,
+    response: Response,
+    x_profile: Optional[str] = Header(default=None),
+):
     """
     Ask the assistant a question.
     Will return a message if no index exists yet.
+    Profiled requests get an X-Profile-Id response header.
     """
     try:
-        user_id = request.user_id or str(uuid4())
-        rag.user_id = user_id
+        with profiler.profile("ask", profiler.should_profile(x_profile)) as session:
+            user_id = request.user_id or str(uuid4())
+            with use_rag(request.tenant_id) as rag:
+                # Ensure the index is ready
+                if not rag.retriever:
+                    if not rag.indexer.is_indexed():
+                        raise HTTPException(status_code=400, detail="Index not found. Please run /reindex first.")
+                    rag.index()  # Load existing persisted index
 
-        # Ensure the index is ready
-        if not rag.vectorstore:
-            if not rag.indexer.is_indexed():
-                raise HTTPException(status_code=400, detail="Index not found. Please run /reindex first.")
-            rag.index()  # Load existing persisted index
+                # Ask the question
+                answer = rag.ask(request.question, user_id=user_id)
 
-        # Ask the question
-        answer = rag.ask(request.question)
+                # Get retrieved documents (if retriever stores them)
+                docs_retrieved = getattr(rag.retriever, "last_retrieved_docs", [])
 
-        # Get retrieved documents (if retriever stores them)
-        docs_retrieved = getattr(rag.retriever, "last_retrieved_docs", [])
+        if session:
+            response.headers["X-Profile-Id"] = session.profile_id
 
         return AskResponse(
             answer=answer,
@@ -94,16 +138,64 @@ def ask_question(request: QuestionRequest):
 
     except HTTPException as e:
         raise e
+    except OverloadedError as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing question: {e}")
 
 @app.post("/reindex")
-def reindex_data():
+def reindex_data(
+    tenant_id: Optional[str] = Query(default=None),
+    x_profile: Optional[str] = Header(default=None),
+):
     """
-    Manually trigger full reindexing of documents.
+    Manually trigger full reindexing of a tenant's documents.
+    When profiled, the response carries the profile id and its report.
     """
     try:
-        rag.index()  # uses the new index() method
-        return {"status": "success", "message": "Reindexing completed successfully."}
+        with profiler.profile("reindex", profiler.should_profile(x_profile)) as session:
+            get_rag(tenant_id)
+            tenants.reindex(tenant_id)
+        result = {"status": "success", "message": "Reindexing completed successfully."}
+        if session:
+            result["profile_id"] = session.profile_id
+            result["report"] = f"/profiles/{session.profile_id}/report.txt"
+        return result
+    except HTTPException as e:
+        raise e
+    except OverloadedError as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error during reindexing: {e}")
+
+@app.get("/profiles")
+def list_profiles(x_profile: Optional[str] = Header(default=None)):
+    """List stored request profiles (requires X-Profile: <PROFILE_TOKEN>; 404 when no token is set)."""
+    if not profiler.downloads_enabled():
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not profiler.authorized(x_profile):
+        raise HTTPException(status_code=403, detail="Invalid profiling token.")
+    return {
+        "profiles": sorted(profiler.list_profiles(), reverse=True),
+        "artifacts": list(ARTIFACTS),
+    }
+
+@app.get("/profiles/{profile_id}/{artifact}")
+def download_profile(profile_id: str, artifact: str, x_profile: Optional[str] = Header(default=None)):
+    """Download one artifact (cpu.prof, memory.snapshot or report.txt) of a stored profile."""
+    if not profiler.downloads_enabled():
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not profiler.authorized(x_profile):
+        raise HTTPException(status_code=403, detail="Invalid profiling token.")
+    path = profiler.artifact_path(profile_id, artifact)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile artifact not found.")
+    return FileResponse(path, media_type=ARTIFACTS[artifact], filename=f"{profile_id}-{artifact}")
@@ -0,0 +1,289 @@
+"""
+Offline retrieval evaluation across chunking, k and retrieval modes.
+
+Takes a labeled set of questions and the passages that answer them,
+rebuilds the index for every chunk size / overlap pair with a local
+embedding model, and prints recall@k, MRR, retrieved context tokens,
+index size, build time and search latency side by side.
+
+Size and build columns describe what each mode serves queries from:
+    disk_kb     files on disk: the Chroma directory for similarity/mmr,
+                the quantized copy (codes, float32 re-score vectors, texts)
+                for float16/int8
+    vectors_kb  vector data held in RAM for search: float32 vectors for
+                Chroma, codes and scales for float16/int8 (their float32
+                copy is memory-mapped)
+    build_s     Chroma build, plus writing the quantized copy for float16/int8
+
+Labels file (JSON list or JSONL), one entry per question:
+    {"question": "Where did Joel study?", "relevant": ["PhD in Computer Science at ..."]}
+
+Usage:
+    python -m app.tools.evaluate_retrieval --labels eval/labels.jsonl \\
+        --chunk-sizes 150,250,500 --overlaps 0,50 -k 3,6,10 --modes similarity,mmr,int8
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import statistics
+import tempfile
+import time
+
+import tiktoken
+
+from app.core.indexer import Indexer
+from app.core.quantized_index import QuantizedVectorIndex
+
+MODES = ("similarity", "mmr", "float16", "int8")
+
+
+class _CachedEmbeddings:
+    """Local embeddings with a cache, so questions are embedded once for the whole grid."""
+    def __init__(self, model_name: str):
+        try:
+            from langchain_huggingface import HuggingFaceEmbeddings
+        except ImportError as e:
+            raise SystemExit(
+                "The evaluation uses a local embedder: pip install langchain-huggingface sentence-transformers"
+            ) from e
+        self.model = HuggingFaceEmbeddings(model_name=model_name)
+        self.cache = {}
+
+    def embed_documents(self, texts: list):
+        return self.model.embed_documents(texts)
+
+    def embed_query(self, text: str):
+        if text not in self.cache:
+            self.cache[text] = self.model.embed_query(text)
+        return self.cache[text]
+
+
+def load_labels(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            entries = [json.loads(line) for line in f if line.strip()]
+        else:
+            entries = json.load(f)
+    labels = []
+    for entry in entries:
+        relevant = entry["relevant"]
+        labels.append({
+            "question": entry["question"],
+            "relevant": [relevant] if isinstance(relevant, str) else list(relevant),
+        })
+    return labels
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+# Words that say nothing about which passage a chunk answers
+STOPWORDS = frozenset("""
+    about above after again against all also and any are because been before being below between
+    both but can could did does doing down during each few for from further had has have having her
+    here hers herself him himself his how into its itself just more most not now off once only other
+    our ours out over own same she should some such than that the their theirs them then there these
+    they this those through too under until very was were what when where which while who whom why
+    will with would you your yours
+""".split())
+
+
+def _tokens(text: str) -> set:
+    """Content words of a text: no stopwords and nothing shorter than three characters."""
+    return {
+        token for token in re.findall(r"\w+", text.lower())
+        if len(token) >= 3 and token not in STOPWORDS
+    }
+
+
+def covers(chunk: str, passage: str, min_overlap: float) -> bool:
+    """
+    A chunk answers a labeled passage if it contains it or contains at least
+    `min_overlap` of its content words. A chunk that is merely part of the
+    passage does not count, so smaller chunks get no recall for free, and
+    stopwords are ignored, so long chunks do not match on filler words.
+    """
+    chunk, passage = _normalize(chunk), _normalize(passage)
+    if passage in chunk:
+        return True
+    passage_tokens = _tokens(passage)
+    if not passage_tokens:
+        return False
+    return len(passage_tokens & _tokens(chunk)) / len(passage_tokens) >= min_overlap
+
+
+def score(retrieved: list, relevant: list, min_overlap: float):
+    """Return (recall, reciprocal rank) of one question's retrieved chunks."""
+    found = set()
+    first_hit = None
+    for rank, chunk in enumerate(retrieved, start=1):
+        hits = {i for i, passage in enumerate(relevant) if covers(chunk, passage, min_overlap)}
+        if hits and first_hit is None:
+            first_hit = rank
+        found |= hits
+    return len(found) / len(relevant), (1 / first_hit if first_hit else 0.0)
+
+
+def _dir_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, files in os.walk(path)
+        for name in files
+    )
+
+
+def _build_quantized(vectorstore, mode: str, path: str, args):
+    """Write the mode's compact copy like the Indexer does and load it back memory-mapped."""
+    index = QuantizedVectorIndex.from_vectorstore(vectorstore, dtype=mode, rescore=args.rescore)
+    index.save(path)
+    return QuantizedVectorIndex.load(path, vectorstore.embeddings, args.rescore)
+
+
+def _searcher(vectorstore, mode: str, k: int, quantized: dict):
+    if mode == "similarity":
+        return lambda q: vectorstore.similarity_search(q, k=k)
+    if mode == "mmr":
+        return lambda q: vectorstore.max_marginal_relevance_search(q, k=k, fetch_k=max(20, 4 * k))
+    return lambda q: quantized[mode].similarity_search(q, k=k)
+
+
+def evaluate(args) -> list:
+    labels = load_labels(args.labels)
+    embedder = _CachedEmbeddings(args.embedding_model)
+    encoding = tiktoken.get_encoding("gpt2")  # same encoding the splitter counts chunk_size in
+    rows = []
+
+    for chunk_size in args.chunk_sizes:
+        for overlap in args.overlaps:
+            if overlap >= chunk_size:
+                continue
+            with tempfile.TemporaryDirectory(prefix="rag_eval_") as persist_dir:
+                indexer = Indexer(
+                    file_path=args.data,
+                    urls=args.urls,
+                    persist_dir=persist_dir,
+                    chunk_size=chunk_size,
+                    chunk_overlap=overlap,
+                    collection_name="evaluation",
+                    embedding_model=embedder,
+                )
+                try:
+                    splits = indexer.load_and_split()
+                    start = time.perf_counter()
+                    vectorstore = indexer.build_vectorstore(splits)
+                    chroma_seconds = time.perf_counter() - start
+                    chroma_bytes = _dir_size(persist_dir)
+                    dim = len(embedder.embed_query(labels[0]["question"])) if labels else 0
+                    chroma_vector_bytes = len(splits) * dim * 4
+
+                    quantized, sizes = {}, {}
+                    for mode in args.modes:
+                        if mode in ("float16", "int8"):
+                            path = os.path.join(persist_dir, "quantized", mode)
+                            start = time.perf_counter()
+                            quantized[mode] = _build_quantized(vectorstore, mode, path, args)
+                            build_seconds = chroma_seconds + time.perf_counter() - start
+                            sizes[mode] = (_dir_size(path), quantized[mode].memory_bytes(), build_seconds)
+                        else:
+                            sizes[mode] = (chroma_bytes, chroma_vector_bytes, chroma_seconds)
+
+                    for mode in args.modes:
+                        disk_bytes, vector_bytes, build_seconds = sizes[mode]
+                        for k in args.k:
+                            search = _searcher(vectorstore, mode, k, quantized)
+                            recalls, reciprocal_ranks, latencies, context_tokens = [], [], [], []
+                            for label in labels:
+                                embedder.embed_query(label["question"])  # keep embedding out of the latency
+                                start = time.perf_counter()
+                                docs = search(label["question"])
+                                latencies.append(1000 * (time.perf_counter() - start))
+                                chunks = [doc.page_content for doc in docs]
+                                recall, reciprocal_rank = score(chunks, label["relevant"], args.min_overlap)
+                                recalls.append(recall)
+                                reciprocal_ranks.append(reciprocal_rank)
+                                context_tokens.append(sum(len(encoding.encode(chunk)) for chunk in chunks))
+
+                            rows.append({
+                                "chunk_size": chunk_size,
+                                "overlap": overlap,
+                                "mode": mode,
+                                "k": k,
+                                "recall": statistics.mean(recalls),
+                                "mrr": statistics.mean(reciprocal_ranks),
+                                "context_tokens": statistics.mean(context_tokens),
+                                "chunks": len(splits),
+                                "disk_kb": disk_bytes / 1024,
+                                "vectors_kb": vector_bytes / 1024,
+                                "build_s": build_seconds,
+                                "p50_ms": statistics.median(latencies),
+                                "p95_ms": sorted(latencies)[int(0.95 * (len(latencies) - 1))],
+                            })
+                finally:
+                    # Stop Chroma's cached client before the temporary directory goes away
+                    indexer.close_vectorstore()
+    return rows
+
+
+def print_table(rows: list):
+    header = (
+        f"{'chunk':>5} {'ovl':>4} {'mode':<10} {'k':>3} {'recall@k':>8} {'MRR':>6} {'ctx_tok':>7} "
+        f"{'chunks':>6} {'disk_kb':>9} {'vectors_kb':>10} {'build_s':>7} {'p50_ms':>7} {'p95_ms':>7}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        print(
+            f"{r['chunk_size']:>5} {r['overlap']:>4} {r['mode']:<10} {r['k']:>3} {r['recall']:>8.3f} "
+            f"{r['mrr']:>6.3f} {r['context_tokens']:>7.0f} {r['chunks']:>6} {r['disk_kb']:>9.1f} {r['vectors_kb']:>10.1f} "
+            f"{r['build_s']:>7.2f} {r['p50_ms']:>7.2f} {r['p95_ms']:>7.2f}"
+        )
+
+
+def _int_list(value: str) -> list:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--labels", required=True, help="JSON or JSONL file of {question, relevant}")
+    parser.add_argument("--data", default="data/user_information/", help="text file or folder to index")
+    parser.add_argument("--urls", nargs="*", default=[], help="URLs indexed along with --data")
+    parser.add_argument("--chunk-sizes", type=_int_list, default=[150, 250, 500])
+    parser.add_argument("--overlaps", type=_int_list, default=[0, 50])
+    parser.add_argument("-k", type=_int_list, default=[3, 6, 10])
+    parser.add_argument("--modes", type=lambda v: v.split(","), default=["similarity", "mmr"],
+                        help=f"comma-separated subset of {','.join(MODES)}")
+    parser.add_argument("--embedding-model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--rescore", type=int, default=4, help="re-scored candidates per result for float16/int8")
+    parser.add_argument("--min-overlap", type=float, default=0.6,
+                        help="share of a passage's content words a chunk must contain to count as a hit")
+    parser.add_argument("--sort", default="recall", choices=["recall", "mrr", "context_tokens", "p50_ms"])
+    parser.add_argument("--output", help="also write the results to this .csv or .json file")
+    args = parser.parse_args()
+
+    unknown = set(args.modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(sorted(unknown))}")
+
+    rows = evaluate(args)
+    # Best first; fewer context tokens break ties
+    descending = args.sort in ("recall", "mrr")
+    rows.sort(key=lambda r: ((-r[args.sort] if descending else r[args.sort]), r["context_tokens"]))
+    print_table(rows)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as f:
+            if args.output.endswith(".json"):
+                json.dump(rows, f, indent=2)
+            else:
+                writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else [])
+                writer.writeheader()
+                writer.writerows(rows)
+        print(f"✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Compare a persisted Chroma collection against its float16 / int8 versions.
+
+Reports the memory held for search and recall@k of the compact index, with
+and without full-precision re-scoring, relative to exact float32 search.
+
+Usage:
+    python -m app.tools.quantization_report --persist-dir ./chroma_db -k 6
+    python -m app.tools.quantization_report --questions questions.txt   # embeds real questions (needs HF_TOKEN)
+"""
+import argparse
+import time
+import numpy as np
+import chromadb
+
+from app.core.quantized_index import QuantizedVectorIndex, _normalize
+
+
+def load_collection(persist_dir: str, collection_name: str):
+    client = chromadb.PersistentClient(path=persist_dir)
+    data = client.get_collection(collection_name).get(include=["embeddings", "documents"])
+    return np.asarray(data["embeddings"], dtype=np.float32), data["documents"]
+
+
+def sample_queries(vectors: np.ndarray, n: int, noise: float, seed: int = 0) -> np.ndarray:
+    """Stored vectors with gaussian noise added, so queries are near but not equal to a row."""
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(vectors), size=min(n, len(vectors)), replace=False)
+    queries = vectors[rows] + rng.normal(scale=noise, size=(len(rows), vectors.shape[1]))
+    return _normalize(queries.astype(np.float32))
+
+
+def embed_questions(path: str, hf_model_name: str) -> np.ndarray:
+    from app.core.indexer import Indexer
+    with open(path, encoding="utf-8") as f:
+        questions = [line.strip() for line in f if line.strip()]
+    embedder = Indexer(file_path=path, hf_model_name=hf_model_name).load_model()
+    return _normalize(np.asarray(embedder.embed_documents(questions), dtype=np.float32))
+
+
+def recall_at_k(index: QuantizedVectorIndex, exact: np.ndarray, queries: np.ndarray, k: int, rescore: int):
+    hits, elapsed = 0, 0.0
+    for query, truth in zip(queries, exact):
+        start = time.perf_counter()
+        rows = [row for row, _ in index.search_by_vector(query, k, rescore=rescore)]
+        elapsed += time.perf_counter() - start
+        hits += len(set(rows) & set(truth))
+    return hits / (len(queries) * k), 1000 * elapsed / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--persist-dir", default="./chroma_db")
+    parser.add_argument("--collection", default="my_text_docs")
+    parser.add_argument("-k", type=int, default=6)
+    parser.add_argument("--rescore", type=int, default=4, help="candidates re-scored per result")
+    parser.add_argument("--queries", type=int, default=200, help="number of sampled queries")
+    parser.add_argument("--noise", type=float, default=0.05, help="noise added to sampled queries")
+    parser.add_argument("--questions", help="text file with one question per line, embedded instead of sampling")
+    parser.add_argument("--hf-model-name", default="sentence-transformers/all-MiniLM-L6-v2")
+    args = parser.parse_args()
+
+    vectors, texts = load_collection(args.persist_dir, args.collection)
+    if not len(texts):
+        print("⚠️ Collection is empty, nothing to compare.")
+        return
+    vectors = _normalize(vectors)
+    if args.questions:
+        queries = embed_questions(args.questions, args.hf_model_name)
+    else:
+        queries = sample_queries(vectors, args.queries, args.noise)
+    k = min(args.k, len(texts))
+
+    # Ground truth: exact float32 search
+    exact = np.argsort(-(queries @ vectors.T), axis=1)[:, :k]
+    full_bytes = vectors.nbytes
+
+    print(f"📊 {len(texts)} vectors x {vectors.shape[1]} dims, {len(queries)} queries, k={k}")
+    print(f"{'dtype':<8} {'bytes':>12} {'saved':>7} {'recall@k':>9} {'+rescore':>9} {'ms/query':>9}")
+    print(f"{'float32':<8} {full_bytes:>12} {'0%':>7} {1.0:>9.3f} {1.0:>9.3f} {'-':>9}")
+    for dtype in ("float16", "int8"):
+        index = QuantizedVectorIndex.build(vectors, texts, dtype=dtype)
+        size = index.memory_bytes()
+        recall, _ = recall_at_k(index, exact, queries, k, rescore=0)
+        rescored, latency = recall_at_k(index, exact, queries, k, rescore=args.rescore)
+        saved = f"{100 * (1 - size / full_bytes):.0f}%"
+        print(f"{dtype:<8} {size:>12} {saved:>7} {recall:>9.3f} {rescored:>9.3f} {latency:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
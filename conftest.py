@@ -0,0 +1 @@
+# Makes the `app` package importable when running `python -m pytest` from the repository root.
@@ -1,6 +1,7 @@
 import streamlit as st
 import uuid
-from app.core.personalized_rag import Personalized_RAG
+from app.core.admission import OverloadedError
+from app.core.resources import get_rag, use_rag
 
 # --------------------------
 # Page Config
@@ -17,12 +18,12 @@ if "user_id" not in st.session_state:
 if "conversation" not in st.session_state:
     st.session_state.conversation = []
 
-if "rag" not in st.session_state:
-    st.session_state.rag = Personalized_RAG(
-        file_path="data/user_information",
-        user_id=st.session_state.user_id,
-        urls=["https://www.linkedin.com/in/joel-chacon-castillo-351bb4194/"]
-    )
+# (role, message) pairs sent to the LLM; the only RAG state kept per session
+if "chat_history" not in st.session_state:
+    st.session_state.chat_history = []
+
+# Index and model clients are shared by every session in this process
+rag = get_rag()
 
 if "question_input" not in st.session_state:
     st.session_state.question_input = ""
@@ -41,7 +42,15 @@ def send_question():
     question = st.session_state.question_input
     if question:
         # Send question to RAG model
-        answer = st.session_state.rag.ask(question)
+        try:
+            with use_rag() as active_rag:
+                answer = active_rag.ask(
+                    question,
+                    user_id=st.session_state.user_id,
+                    history=st.session_state.chat_history,
+                )
+        except OverloadedError as e:
+            answer = f"⏳ {e} Try again in {e.retry_after}s."
         
         # Update conversation history
         st.session_state.conversation.append({"role": "user", "content": question})
@@ -138,8 +147,8 @@ with chat_placeholder.container():
 # Optional: show source documents
 # --------------------------
 with st.expander("Source Documents"):
-    if hasattr(st.session_state.rag.retriever, "last_retrieved_docs"):
-        docs_retrieved = st.session_state.rag.retriever.last_retrieved_docs
+    if hasattr(rag.retriever, "last_retrieved_docs"):
+        docs_retrieved = rag.retriever.last_retrieved_docs
     else:
         docs_retrieved = []
 
@@ -1,95 +1,18 @@
 # app_combined.py
 import threading
 import uuid
-import requests
 import streamlit as st
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional
-from uuid import uuid4
 import uvicorn
 
 # =====================================================
-# Import your RAG class
+# Shared RAG core and API
 # =====================================================
-from app.core.personalized_rag import Personalized_RAG
-
-
-# =====================================================
-# ---------- FASTAPI SECTION ----------
-# =====================================================
-api = FastAPI(title="Joel's Assistant API", version="1.1")
-
-
-class QuestionRequest(BaseModel):
-    user_id: Optional[str] = None
-    question: str
-
-
-class AskResponse(BaseModel):
-    answer: str
-    documents: Optional[List[str]] = None
-
-
-rag = Personalized_RAG(
-    file_path="data/user_information/",
-    user_id="default_user",
-    persist_dir="./chroma_db",
-)
-
-
-@api.get("/")
-async def root():
-    return {"message": "Welcome to Joel's Personalized RAG API 🚀"}
-
-
-@api.get("/health")
-async def healthcheck():
-    try:
-        _ = rag.user_id
-        return {"status": "ok", "service": "joel-assistant", "version": "1.1"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Healthcheck failed: {e}")
-
-
-@api.get("/status")
-async def status():
-    indexed = rag.indexer.is_indexed()
-    return {"indexed": indexed, "user_id": rag.user_id}
-
-
-@api.post("/ask", response_model=AskResponse)
-def ask_question(request: QuestionRequest):
-    try:
-        user_id = request.user_id or str(uuid4())
-        rag.user_id = user_id
-
-        if not rag.vectorstore:
-            if not rag.indexer.is_indexed():
-                raise HTTPException(status_code=400, detail="Index not found. Please run /reindex first.")
-            rag.index()
-
-        answer = rag.ask(request.question)
-        docs_retrieved = getattr(rag.retriever, "last_retrieved_docs", [])
-
-        return AskResponse(
-            answer=answer,
-            documents=[doc.page_content for doc in docs_retrieved] if docs_retrieved else [],
-        )
-
-    except HTTPException as e:
-        raise e
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing question: {e}")
-
-
-@api.post("/reindex")
-def reindex_data():
-    try:
-        rag.index()
-        return {"status": "success", "message": "Reindexing completed successfully."}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error during reindexing: {e}")
+# app.main builds its routes on the process-wide tenant registry, so the API
+# thread and every Streamlit session below share one index and one set of
+# model clients.
+from app.core.admission import OverloadedError
+from app.core.resources import use_rag
+from app.main import app as api
 
 
 def run_api():
@@ -97,12 +20,20 @@ def run_api():
     uvicorn.run(api, host="0.0.0.0", port=8001, log_level="warning")
 
 
+@st.cache_resource
+def start_api():
+    """Launch the API thread once per process, not on every Streamlit rerun."""
+    thread = threading.Thread(target=run_api, daemon=True)
+    thread.start()
+    return thread
+
+
 # =====================================================
 # ---------- STREAMLIT SECTION ----------
 # =====================================================
 
-# Launch FastAPI in background
-threading.Thread(target=run_api, daemon=True).start()
+# Launch FastAPI in background (for external clients)
+start_api()
 
 # Page Config
 st.set_page_config(page_title="Joel's Assistant", layout="wide")
@@ -115,32 +46,31 @@ if "user_id" not in st.session_state:
 if "conversation" not in st.session_state:
     st.session_state.conversation = []
 
-API_URL = "http://localhost:8001"
+# (role, message) pairs sent to the LLM; the only RAG state kept per session
+if "chat_history" not in st.session_state:
+    st.session_state.chat_history = []
 
-# Function to send a question (via FastAPI endpoint)
+# Function to send a question (directly to the shared RAG core)
 def send_question():
     question = st.session_state.question_input.strip()
     if not question:
         return
 
     try:
-        resp = requests.post(
-            f"{API_URL}/ask",
-            json={"user_id": st.session_state.user_id, "question": question},
-            timeout=60,
-        )
-
-        if resp.status_code == 200:
-            data = resp.json()
-            answer = data["answer"]
-            docs = data.get("documents", [])
-        else:
-            answer = f"Error: {resp.status_code} - {resp.text}"
-            docs = []
+        with use_rag() as rag:
+            try:
+                answer = rag.ask(
+                    question,
+                    user_id=st.session_state.user_id,
+                    history=st.session_state.chat_history,
+                )
+            except OverloadedError as e:
+                answer = f"⏳ {e} Try again in {e.retry_after}s."
+            docs_retrieved = getattr(rag.retriever, "last_retrieved_docs", [])
 
         st.session_state.conversation.append({"role": "user", "content": question})
         st.session_state.conversation.append({"role": "assistant", "content": answer})
-        st.session_state.retrieved_docs = docs
+        st.session_state.retrieved_docs = [doc.page_content for doc in docs_retrieved]
 
     except Exception as e:
         st.session_state.conversation.append(
@@ -0,0 +1,106 @@
+import threading
+import time
+
+import pytest
+
+from app.core.admission import ConcurrencyLimiter, OverloadedError, UserLimitError
+
+
+def _hold(limiter, user_id, release, started=None):
+    with limiter.slot(user_id):
+        if started is not None:
+            started.set()
+        release.wait(timeout=5)
+
+
+def _start(target, *args):
+    thread = threading.Thread(target=target, args=args, daemon=True)
+    thread.start()
+    return thread
+
+
+def _wait_for_queue(limiter, depth):
+    deadline = time.monotonic() + 5
+    while limiter.stats()["queue_depth"] < depth:
+        assert time.monotonic() < deadline, "queue never reached the expected depth"
+        time.sleep(0.01)
+
+
+def test_rejects_with_503_when_queue_is_full():
+    limiter = ConcurrencyLimiter("llm", max_concurrent=1, max_queue=1, max_per_user=5, queue_timeout=5)
+    release = threading.Event()
+    started = threading.Event()
+    holder = _start(_hold, limiter, "a", release, started)
+    started.wait(timeout=5)
+    waiter = _start(_hold, limiter, "b", release)
+    _wait_for_queue(limiter, 1)
+
+    with pytest.raises(OverloadedError) as excinfo:
+        limiter.acquire("c")
+    assert excinfo.value.status_code == 503
+    assert excinfo.value.retry_after >= 1
+
+    release.set()
+    holder.join(timeout=5)
+    waiter.join(timeout=5)
+    stats = limiter.stats()
+    assert stats["rejected"] == 1
+    assert stats["admitted"] == 2
+    assert stats["active"] == 0
+
+
+def test_rejects_with_429_when_user_has_too_many_pending():
+    limiter = ConcurrencyLimiter("llm", max_concurrent=1, max_queue=10, max_per_user=1, queue_timeout=5)
+    release = threading.Event()
+    started = threading.Event()
+    holder = _start(_hold, limiter, "a", release, started)
+    started.wait(timeout=5)
+    waiter = _start(_hold, limiter, "b", release)
+    _wait_for_queue(limiter, 1)
+
+    with pytest.raises(UserLimitError) as excinfo:
+        limiter.acquire("b")
+    assert excinfo.value.status_code == 429
+
+    release.set()
+    holder.join(timeout=5)
+    waiter.join(timeout=5)
+
+
+def test_timed_out_waiter_leaves_the_queue():
+    limiter = ConcurrencyLimiter("llm", max_concurrent=1, max_queue=2, max_per_user=2, queue_timeout=0.1)
+    limiter.acquire("a")
+
+    with pytest.raises(OverloadedError) as excinfo:
+        limiter.acquire("b")
+    assert excinfo.value.status_code == 503
+    assert not isinstance(excinfo.value, UserLimitError)
+    stats = limiter.stats()
+    assert stats["timed_out"] == 1
+    assert stats["queue_depth"] == 0
+
+    # The abandoned ticket must not swallow the slot when it frees up
+    limiter.release()
+    limiter.acquire("b")
+    assert limiter.stats()["active"] == 1
+    limiter.release()
+
+
+def test_waiting_users_are_served_round_robin():
+    limiter = ConcurrencyLimiter("llm", max_concurrent=1, max_queue=10, max_per_user=5, queue_timeout=5)
+    order = []
+
+    def work(user_id):
+        with limiter.slot(user_id):
+            order.append(user_id)
+
+    limiter.acquire("holder")
+    threads = []
+    for user_id in ["a", "a", "a", "b"]:
+        threads.append(_start(work, user_id))
+        _wait_for_queue(limiter, len(threads))
+    limiter.release()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert order == ["a", "b", "a", "a"]
@@ -0,0 +1,32 @@
+import pytest
+
+pytest.importorskip("langchain_chroma")
+pytest.importorskip("tiktoken")
+
+from app.tools.evaluate_retrieval import covers, score  # noqa: E402
+
+PASSAGE = "Joel completed a PhD in Computer Science at CIMAT in Guanajuato, Mexico."
+
+
+def test_chunk_containing_the_passage_covers_it():
+    assert covers(f"Education. {PASSAGE} Then he moved on.", PASSAGE, min_overlap=0.6)
+
+
+def test_fragment_of_the_passage_does_not_cover_it():
+    assert not covers("PhD in Computer Science", PASSAGE, min_overlap=0.6)
+
+
+def test_chunk_sharing_only_names_and_filler_words_does_not_cover_it():
+    chunk = "Joel worked as a data engineer at a startup in Mexico City, teaching computer science workshops."
+    assert not covers(chunk, PASSAGE, min_overlap=0.6)
+
+
+def test_chunk_with_most_of_the_words_covers_the_passage():
+    chunk = "Joel completed his PhD in Computer Science at CIMAT (Guanajuato)."
+    assert covers(chunk, PASSAGE, min_overlap=0.6)
+
+
+def test_score_ranks_the_first_covering_chunk():
+    recall, reciprocal_rank = score(["Joel", "unrelated text", PASSAGE], [PASSAGE], min_overlap=0.6)
+    assert recall == 1.0
+    assert reciprocal_rank == pytest.approx(1 / 3)
@@ -0,0 +1,120 @@
+import threading
+import time
+
+import pytest
+
+from app.core.admission import ConcurrencyLimiter
+from app.core.http_client import DeadlineExceeded, ResilientCaller, is_transient
+
+
+class _Transient(Exception):
+    status_code = 503
+
+
+def test_slow_call_returns_within_deadline():
+    caller = ResilientCaller("slow", timeout=30.0, deadline=0.3, retries=2)
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        caller.call(lambda: time.sleep(2))
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 0.6
+    assert caller.stats()["deadline_exceeded"] == 1
+
+
+def test_abandoned_attempt_keeps_its_limiter_slot():
+    limiter = ConcurrencyLimiter("llm", max_concurrent=1, max_queue=8, queue_timeout=5)
+    caller = ResilientCaller("slow", timeout=30.0, deadline=0.1, retries=0)
+    lock = threading.Lock()
+    in_flight = []
+    peak = []
+
+    def slow():
+        with lock:
+            in_flight.append(1)
+            peak.append(len(in_flight))
+        time.sleep(0.3)
+        with lock:
+            in_flight.pop()
+
+    for _ in range(3):
+        with pytest.raises(DeadlineExceeded):
+            caller.call(slow, limiter=limiter)
+        # Still held by the attempt that is running upstream past the deadline
+        assert limiter.stats()["active"] == 1
+
+    time.sleep(0.4)
+    assert max(peak) == 1
+    assert limiter.stats()["active"] == 0
+
+
+def test_transient_errors_are_retried():
+    caller = ResilientCaller("flaky", deadline=5.0, retries=3, backoff=0.01)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise _Transient()
+        return "ok"
+
+    assert caller.call(flaky) == "ok"
+    assert caller.stats()["retries"] == 2
+
+
+def test_permanent_errors_are_not_retried():
+    caller = ResilientCaller("broken", deadline=5.0, retries=3, backoff=0.01)
+    with pytest.raises(ZeroDivisionError):
+        caller.call(lambda: 1 / 0)
+    assert caller.stats()["retries"] == 0
+
+
+def test_hedge_wins_over_slow_primary():
+    caller = ResilientCaller("hedged", deadline=2.0, hedge_delay=0.05)
+    calls = []
+    lock = threading.Lock()
+
+    def embed():
+        with lock:
+            calls.append(1)
+            first = len(calls) == 1
+        time.sleep(0.5 if first else 0.01)
+        return "first" if first else "hedge"
+
+    assert caller.call(embed) == "hedge"
+    stats = caller.stats()
+    assert stats["hedges_fired"] == 1
+    assert stats["hedges_won"] == 1
+
+
+def test_hedge_is_skipped_when_limiter_is_full():
+    limiter = ConcurrencyLimiter("embedding", max_concurrent=1, max_queue=4)
+    caller = ResilientCaller("hedged", deadline=2.0, hedge_delay=0.05)
+
+    # The call's own slot fills the limiter, so there is none left for a hedge
+    assert caller.call(lambda: time.sleep(0.2) or "done", limiter=limiter) == "done"
+
+    stats = caller.stats()
+    assert stats["hedges_fired"] == 0
+    assert stats["hedges_skipped"] == 1
+    assert limiter.stats()["active"] == 0
+
+
+def test_hedge_holds_a_limiter_slot_until_it_finishes():
+    limiter = ConcurrencyLimiter("embedding", max_concurrent=2, max_queue=4)
+    caller = ResilientCaller("hedged", deadline=2.0, hedge_delay=0.05)
+
+    caller.call(lambda: time.sleep(0.2) or "done", limiter=limiter)
+    # The losing hedge is still running and counted against the limiter
+    assert limiter.stats()["active"] == 1
+    time.sleep(0.4)
+    assert limiter.stats()["active"] == 0
+    assert caller.stats()["hedges_fired"] == 1
+
+
+def test_httpx_transport_errors_are_transient():
+    httpx = pytest.importorskip("httpx")
+    assert is_transient(httpx.ReadTimeout("timed out"))
+    assert is_transient(httpx.ConnectError("refused"))
+    assert not is_transient(ValueError("bad input"))
@@ -0,0 +1,55 @@
+import os
+import time
+
+import pytest
+
+pytest.importorskip("langchain_chroma")
+
+from app.core.indexer import Indexer  # noqa: E402
+
+
+@pytest.fixture
+def indexer(tmp_path, monkeypatch):
+    indexer = Indexer(file_path=str(tmp_path / "docs"), persist_dir=str(tmp_path), embedding_model=object())
+    (tmp_path / "chroma.sqlite3").write_text("")
+    opened = []
+
+    def get_vectorstore():
+        opened.append(1)
+        indexer.vectorstore = object()
+        return indexer.vectorstore
+
+    monkeypatch.setattr(indexer, "get_vectorstore", get_vectorstore)
+    monkeypatch.setattr(indexer, "close_vectorstore", lambda: setattr(indexer, "vectorstore", None))
+    indexer.opened = opened
+    return indexer
+
+
+def test_close_makes_the_next_access_reopen_the_store(indexer):
+    first = indexer.get_search_index()
+    assert indexer.get_search_index() is first
+    assert len(indexer.opened) == 1
+
+    indexer.close()
+    assert indexer.get_search_index() is not first
+    assert len(indexer.opened) == 2
+
+
+def test_stale_quantized_copy_is_rebuilt(indexer, monkeypatch):
+    indexer.index_dtype = "int8"
+    os.makedirs(indexer.quantized_path)
+    with open(os.path.join(indexer.quantized_path, "docs.json"), "w") as f:
+        f.write("{}")
+    rebuilt = []
+    def build_quantized_index():
+        rebuilt.append(1)
+        indexer.search_index = "rebuilt"
+
+    monkeypatch.setattr(indexer, "build_quantized_index", build_quantized_index)
+
+    # Chroma changed after the copy was written
+    later = time.time() + 10
+    os.utime(os.path.join(indexer.persist_dir, "chroma.sqlite3"), (later, later))
+    assert not indexer.quantized_is_current()
+    assert indexer.get_search_index() == "rebuilt"
+    assert rebuilt == [1]
@@ -0,0 +1,41 @@
+import pytest
+
+from app.core.profiling import RequestProfiler
+
+
+def test_downloads_need_a_configured_token(tmp_path):
+    profiler = RequestProfiler(output_dir=str(tmp_path), sample_rate=1.0)
+    assert not profiler.downloads_enabled()
+    assert not profiler.authorized(None)
+    assert not profiler.authorized("")
+
+    profiler = RequestProfiler(output_dir=str(tmp_path), token="secret")
+    assert profiler.authorized("secret")
+    assert not profiler.authorized("wrong")
+    assert not profiler.authorized(None)
+
+
+def test_profile_is_written(tmp_path):
+    profiler = RequestProfiler(output_dir=str(tmp_path), token="secret")
+    with profiler.profile("ask", enabled=True) as session:
+        sum(range(1000))
+    assert profiler.list_profiles() == [session.profile_id]
+    assert profiler.artifact_path(session.profile_id, "report.txt")
+
+
+def test_write_failure_keeps_the_request_result(tmp_path):
+    blocked = tmp_path / "profiles"
+    blocked.write_text("not a directory")
+    profiler = RequestProfiler(output_dir=str(blocked), token="secret")
+
+    with profiler.profile("ask", enabled=True):
+        result = "answer"
+    assert result == "answer"
+
+    # The request's own error still propagates unchanged
+    with pytest.raises(KeyError):
+        with profiler.profile("ask", enabled=True):
+            raise KeyError("boom")
+    # The profiler is free again for the next request
+    with profiler.profile("ask", enabled=True) as session:
+        assert session is not None
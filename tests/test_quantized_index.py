@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from app.core.quantized_index import QuantizedVectorIndex, _normalize, quantize
+
+
+def _vectors(n=200, dim=32, seed=0):
+    return _normalize(np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32))
+
+
+def test_int8_codes_round_trip_through_their_scales():
+    vectors = _vectors()
+    codes, scales = quantize(vectors, "int8")
+
+    assert codes.dtype == np.int8
+    assert np.abs(codes).max(axis=1).tolist() == [127] * len(vectors)
+    restored = codes.astype(np.float32) * scales[:, None]
+    assert np.abs(restored - vectors).max() <= scales.max() / 2 + 1e-6
+
+
+def test_int8_zero_vector_keeps_a_unit_scale():
+    codes, scales = quantize(np.zeros((1, 4), dtype=np.float32), "int8")
+    assert scales.tolist() == [1.0]
+    assert codes.tolist() == [[0, 0, 0, 0]]
+
+
+def test_float16_has_no_scales():
+    codes, scales = quantize(_vectors(), "float16")
+    assert codes.dtype == np.float16
+    assert scales is None
+
+
+def test_unknown_dtype_is_rejected():
+    with pytest.raises(ValueError):
+        quantize(_vectors(), "int4")
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+@pytest.mark.parametrize("rescore", [0, 4])
+def test_search_finds_the_exact_neighbours(dtype, rescore):
+    vectors = _vectors()
+    texts = [f"doc {i}" for i in range(len(vectors))]
+    index = QuantizedVectorIndex.build(vectors, texts, dtype=dtype, rescore=rescore)
+
+    query = vectors[17] + 0.01 * _vectors(1, seed=1)[0]
+    expected = np.argsort(-(vectors @ _normalize(query)))[:5].tolist()
+    results = index.search_by_vector(query, k=5)
+
+    assert results[0][0] == 17
+    if rescore:
+        # Re-scored results are ranked by the exact float32 cosine
+        assert [row for row, _ in results] == expected
+        assert results[0][1] == pytest.approx(float(vectors[17] @ _normalize(query)), abs=1e-5)
+    else:
+        assert len(set(row for row, _ in results) & set(expected)) >= 4
+
+
+def test_empty_index_returns_nothing():
+    index = QuantizedVectorIndex.build([], [], dtype="int8")
+    assert index.search_by_vector(np.ones(8), k=3) == []
+    assert index.memory_bytes() == 0
+
+
+def test_k_larger_than_the_index():
+    index = QuantizedVectorIndex.build(_vectors(3), ["a", "b", "c"], dtype="int8")
+    assert len(index.search_by_vector(_vectors(1, seed=2)[0], k=10)) == 3
+
+
+def test_saved_index_loads_memory_mapped_and_can_be_rewritten(tmp_path):
+    vectors = _vectors()
+    texts = [f"doc {i}" for i in range(len(vectors))]
+    index = QuantizedVectorIndex.build(vectors, texts, dtype="int8")
+    index.save(str(tmp_path))
+
+    loaded = QuantizedVectorIndex.load(str(tmp_path))
+    assert isinstance(loaded.full, np.memmap)
+    assert loaded.search_by_vector(vectors[3], k=1)[0][0] == 3
+
+    # Rewriting the copy must not disturb an index that still maps the old files
+    QuantizedVectorIndex.build(vectors[:10], texts[:10], dtype="float16").save(str(tmp_path))
+    assert loaded.search_by_vector(vectors[150], k=1)[0][0] == 150
+    reloaded = QuantizedVectorIndex.load(str(tmp_path))
+    assert reloaded.dtype == "float16"
+    assert reloaded.scales is None
+    assert len(reloaded.texts) == 10
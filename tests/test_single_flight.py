@@ -0,0 +1,113 @@
+import threading
+import time
+
+import pytest
+
+from app.core.admission import OverloadedError, UserLimitError
+from app.core.single_flight import SingleFlight
+
+
+def _run_concurrently(n, target):
+    threads = [threading.Thread(target=target) for _ in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+
+def test_concurrent_calls_share_one_computation():
+    flight = SingleFlight()
+    calls = []
+    results = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return 42
+
+    _run_concurrently(10, lambda: results.append(flight.do("question", compute)))
+
+    assert calls == [1]
+    assert results == [42] * 10
+    assert flight.stats["leaders"] == 1
+    assert flight.stats["coalesced"] == 9
+    assert flight.in_flight() == 0
+
+
+def test_errors_are_shared_with_waiters():
+    flight = SingleFlight()
+    errors = []
+
+    def compute():
+        time.sleep(0.2)
+        raise RuntimeError("upstream failed")
+
+    def ask():
+        try:
+            flight.do("question", compute)
+        except RuntimeError as e:
+            errors.append(e)
+
+    _run_concurrently(5, ask)
+
+    assert len(errors) == 5
+    assert flight.in_flight() == 0
+
+
+def test_waiters_retry_on_leader_rejection_through_one_new_leader():
+    flight = SingleFlight()
+    calls = []
+    results = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        if len(calls) == 1:
+            raise UserLimitError("too many pending requests for this user")
+        return "answer"
+
+    def ask():
+        try:
+            results.append(flight.do("question", compute, retry_on=(UserLimitError,)))
+        except OverloadedError as e:
+            results.append(e.status_code)
+
+    _run_concurrently(10, ask)
+
+    # Only the leader sees its own 429; the waiters coalesced on a single retry
+    assert sorted(results, key=str) == [429] + ["answer"] * 9
+    assert len(calls) == 2
+    assert flight.stats["retried"] == 9
+    assert flight.in_flight() == 0
+
+
+def test_global_overload_is_shared_with_waiters():
+    flight = SingleFlight()
+    calls = []
+    statuses = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        raise OverloadedError("queue is full", status_code=503)
+
+    def ask():
+        try:
+            flight.do("question", compute, retry_on=(UserLimitError,))
+        except OverloadedError as e:
+            statuses.append(e.status_code)
+
+    _run_concurrently(10, ask)
+
+    assert calls == [1]
+    assert statuses == [503] * 10
+    assert flight.stats["retried"] == 0
+
+
+def test_key_is_forgotten_after_the_call():
+    flight = SingleFlight()
+    assert flight.do("question", lambda: 1) == 1
+    assert flight.do("question", lambda: 2) == 2
+    with pytest.raises(ValueError):
+        flight.do("question", lambda: int("x"))
+    assert flight.in_flight() == 0
@@ -0,0 +1,74 @@
+import time
+
+import pytest
+
+pytest.importorskip("langchain_chroma")
+
+from app.core.tenants import DEFAULT_TENANT, TenantRegistry  # noqa: E402
+
+
+@pytest.mark.parametrize("tenant_id", ["a", "ana", "team-42", "a_b", "x" * 56])
+def test_valid_tenant_ids(tenant_id):
+    assert TenantRegistry().validate(tenant_id) == tenant_id
+
+
+@pytest.mark.parametrize("tenant_id", ["ana-", "ana_", "-ana", "a.b", "a/b", "x" * 57, "ana "])
+def test_invalid_tenant_ids(tenant_id):
+    with pytest.raises(ValueError):
+        TenantRegistry().validate(tenant_id)
+
+
+def test_missing_tenant_id_is_the_default():
+    assert TenantRegistry().validate(None) == DEFAULT_TENANT
+
+
+class _FakeRAG:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.agent = type("Agent", (), {"llm": object()})()
+        self.indexer = type("Indexer", (), {"load_model": lambda self: object()})()
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    import app.core.tenants as tenants
+
+    stopped = []
+    monkeypatch.setattr(tenants, "Personalized_RAG", _FakeRAG)
+    monkeypatch.setattr(tenants, "detach_chroma", lambda persist_dir: persist_dir)
+    monkeypatch.setattr(tenants, "stop_chroma", stopped.append)
+    for tenant_id in ("ana", "bob"):
+        (tmp_path / "data" / tenant_id).mkdir(parents=True)
+    registry = TenantRegistry(
+        data_dir=str(tmp_path / "data"), persist_dir=str(tmp_path / "db"), idle_ttl=0.05
+    )
+    registry.stopped = stopped
+    return registry
+
+
+def test_idle_tenants_are_closed_and_stopped(registry):
+    registry.get("ana")
+    registry.evict_idle()
+    assert registry.stats()["open"] == ["ana"]
+
+    time.sleep(0.1)
+    registry.evict_idle()
+    assert registry.stats()["open"] == []
+    assert registry.stopped == [registry.tenant_persist_dir("ana")]
+
+
+def test_tenant_in_use_is_stopped_after_the_request(registry):
+    with registry.use("ana") as rag:
+        time.sleep(0.1)
+        registry.evict_idle()
+        assert registry.stats()["open"] == []
+        assert registry.stopped == []  # still answering a request
+        assert isinstance(rag, _FakeRAG)
+    assert registry.stopped == [registry.tenant_persist_dir("ana")]
+
+
+def test_janitor_evicts_in_the_background(registry):
+    registry.get("ana")
+    registry.start_janitor(interval=0.05)
+    time.sleep(0.3)
+    assert registry.stats()["open"] == []